@@ -1,11 +1,31 @@
 import bpy
+import bmesh
 import os
+import io
 import re
 import math
+import random
 import shutil
+import logging
+import time
 from mathutils import Vector, Matrix
-from collections import defaultdict
+import numpy as np
+from collections import defaultdict, namedtuple
 import traceback
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+# pandas为可选依赖（Blender默认不自带），可用时用于快速解析映射表
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# numba为可选依赖，可用时面方向分类走JIT内核
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 bl_info = {
     "name": "Mini自然地形tool",
@@ -17,6 +37,52 @@ bl_info = {
     "category": "Object",
 }
 
+# 调试输出走logging，默认级别下不格式化也不写stdout
+log = logging.getLogger(__name__)
+_VERBOSE_HANDLER = logging.StreamHandler()
+
+def set_verbose_logging(enabled):
+    """开关详细日志：开启时把DEBUG级别输出到控制台"""
+    if enabled:
+        log.setLevel(logging.DEBUG)
+        if _VERBOSE_HANDLER not in log.handlers:
+            log.addHandler(_VERBOSE_HANDLER)
+    else:
+        log.setLevel(logging.NOTSET)
+        log.removeHandler(_VERBOSE_HANDLER)
+
+# Principled BSDF在Blender 4.0中重命名了部分输入，按版本一次确定，材质创建时不再逐个探测
+if bpy.app.version >= (4, 0, 0):
+    _BSDF_SPECULAR_KEY = 'Specular IOR Level'
+    _BSDF_SUBSURFACE_KEY = 'Subsurface Weight'
+else:
+    _BSDF_SPECULAR_KEY = 'Specular'
+    _BSDF_SUBSURFACE_KEY = 'Subsurface'
+
+# ============================================================================
+# 预编译正则
+# ============================================================================
+
+_WS_RE = re.compile(r'\s+')               # 空白分隔
+_DUP_SUFFIX_RE = re.compile(r'\.\d{3}$')   # Blender重名后缀 .001 等
+_DIGITS_RE = re.compile(r'\d+')            # 文件夹名中的数字
+
+# 对象命名前缀：模板容器及其主/子模型、生成的方块
+_TEMPLATE_PREFIXES = ("BlockTemplate_", "BlockMain_", "BlockSub_")
+_BLOCK_PREFIX = "Block_"
+
+# ============================================================================
+# 方块类型分组
+# ============================================================================
+
+_SOIL_TYPES = frozenset({'soil', 'plantash'})
+_MINESTONE_TYPES = frozenset({'minestone', 'stone', 'buildblueprint', 'regionreplicator',
+                              'replicator', 'airwall', 'copier'})
+_SUBMODEL_ONLY_TYPES = frozenset({'replicator', 'regionreplicator', 'airwall', 'copier'})
+
+# 面 -> 贴图文件名后缀（X面用_z贴图，Y面用_x贴图，Z面用_y贴图）
+_FACE_TEXTURE_SUFFIX = {'x': '_z', 'y': '_x', 'z': '_y'}
+
 # ============================================================================
 # 全局管理类
 # ============================================================================
@@ -40,7 +106,10 @@ class BlockModelManager:
             self._mapping_table = None
             self._mapping_file_path = None
             self._materials = {}  # 材质缓存
+            self._mat_by_signature = {}  # 材质内容签名 -> 材质，贴图和面类型相同的位置ID共用
             self._loaded_textures = {}  # 已加载的贴图缓存
+            self._dir_cache = {}  # 文件夹 -> 文件名集合，代替逐个os.path.exists
+            self._obj_index = {}  # 模型根目录 -> {(相对文件夹, 文件名): OBJ路径}
             self._initialized = True
     
     def get_template(self, position_id):
@@ -82,14 +151,99 @@ class BlockModelManager:
         """设置指定位置ID的模型配置"""
         self._model_configs[position_id] = model_config
     
+    def get_or_build_config(self, position_id, texture_base_path, models_base_path):
+        """获取位置ID的模型配置，未缓存或路径/映射数据变化时才重新构建"""
+        mapping_data = self.get_mapping_for_id(position_id)
+        model_config = self._model_configs.get(position_id)
+        if (model_config is None
+                or model_config.mapping_data is not mapping_data
+                or model_config.texture_base_path != texture_base_path
+                or model_config.models_base_path != models_base_path):
+            model_config = ModelConfig(position_id, mapping_data, texture_base_path, models_base_path)
+            self._model_configs[position_id] = model_config
+        return model_config
+    
     def get_material(self, material_name):
-        """获取材质"""
-        return self._materials.get(material_name)
+        """获取材质：先查管理器缓存，未命中时只查一次bpy.data并记入缓存"""
+        material = self._materials.get(material_name)
+        if material is not None:
+            try:
+                material.name  # 材质已被删除时抛出ReferenceError
+                return material
+            except ReferenceError:
+                del self._materials[material_name]
+        
+        material = bpy.data.materials.get(material_name)
+        if material is not None:
+            self._materials[material_name] = material
+        return material
     
     def set_material(self, material_name, material):
         """设置材质"""
         self._materials[material_name] = material
     
+    def get_material_by_signature(self, signature):
+        """按内容签名获取已创建的材质（已被删除的材质视为未命中）"""
+        material = self._mat_by_signature.get(signature)
+        if material is None:
+            return None
+        try:
+            material.name
+        except ReferenceError:
+            del self._mat_by_signature[signature]
+            return None
+        return material
+    
+    def set_material_by_signature(self, signature, material):
+        """记录材质的内容签名"""
+        self._mat_by_signature[signature] = material
+    
+    def files_in(self, folder):
+        """获取文件夹下的文件名集合（每个文件夹只listdir一次）"""
+        files = self._dir_cache.get(folder)
+        if files is None:
+            if os.path.isdir(folder):
+                files = frozenset(os.path.normcase(name) for name in os.listdir(folder))
+            else:
+                files = frozenset()
+            self._dir_cache[folder] = files
+        return files
+    
+    def file_exists(self, path):
+        """通过文件夹列表缓存判断文件是否存在"""
+        folder, filename = os.path.split(path)
+        return os.path.normcase(filename) in self.files_in(folder)
+    
+    def _get_obj_index(self, models_base_path):
+        """首次使用时遍历模型根目录，建立OBJ文件索引"""
+        index = self._obj_index.get(models_base_path)
+        if index is None:
+            index = {}
+            for root, _dirs, files in os.walk(models_base_path):
+                rel_folder = os.path.normcase(os.path.relpath(root, models_base_path))
+                for name in files:
+                    if name.lower().endswith('.obj'):
+                        index[(rel_folder, os.path.normcase(name))] = os.path.join(root, name)
+            self._obj_index[models_base_path] = index
+        return index
+    
+    def find_obj(self, models_base_path, position_id, submodel_name):
+        """按 id文件夹 -> models文件夹 的顺序查找子模型OBJ（含_lod1/_lod0变体）"""
+        index = self._get_obj_index(models_base_path)
+        names = [os.path.normcase(f"{submodel_name}{suffix}.obj") for suffix in ("", "_lod1", "_lod0")]
+        for folder in (os.path.normcase(str(position_id)), "models"):
+            for name in names:
+                path = index.get((folder, name))
+                if path:
+                    return path
+        return None
+    
+    def clear_dir_cache(self):
+        """清除文件夹列表、OBJ索引和文件存在性缓存（磁盘上的文件可能已变化）"""
+        self._dir_cache.clear()
+        self._obj_index.clear()
+        clear_exists_cache()
+    
     def clear_templates_and_configs(self):
         """清除模板和模型配置，但保留映射表和材质缓存"""
         print("清除模板和模型配置...")
@@ -97,6 +251,8 @@ class BlockModelManager:
         # 清除模板引用
         self._templates.clear()
         self._model_configs.clear()
+        self.clear_dir_cache()
+        invalidate_face_cache()
         
         print(f"模板和模型配置已清除")
     
@@ -107,7 +263,11 @@ class BlockModelManager:
         self._templates.clear()
         self._model_configs.clear()
         self._materials.clear()
+        self._mat_by_signature.clear()
+        clear_node_tree_templates()
         self._loaded_textures.clear()
+        self.clear_dir_cache()
+        invalidate_face_cache()
         
         print(f"除映射表外的所有数据已清除")
     
@@ -118,9 +278,13 @@ class BlockModelManager:
         self._templates.clear()
         self._model_configs.clear()
         self._materials.clear()
+        self._mat_by_signature.clear()
+        clear_node_tree_templates()
         self._loaded_textures.clear()
         self._mapping_table = None
         self._mapping_file_path = None
+        self.clear_dir_cache()
+        invalidate_face_cache()
         
         print(f"所有数据已清除")
     
@@ -134,7 +298,7 @@ class BlockModelManager:
         
         for mat in bpy.data.materials:
             if mat.name.startswith("BlockMat_"):
-                base_name = re.sub(r'\.\d{3}$', '', mat.name)  # 移除.001等后缀
+                base_name = _DUP_SUFFIX_RE.sub('', mat.name)  # 移除.001等后缀
                 
                 if base_name not in block_materials:
                     block_materials[base_name] = [mat]
@@ -152,36 +316,35 @@ class BlockModelManager:
                         duplicates.append(mat)
                         print(f"标记为重复: {mat.name}")
         
-        # 从管理器中移除重复材质
+        # 从管理器中移除重复材质（按数据块指针建立反向索引，避免逐个扫描缓存）
+        keys_by_pointer = defaultdict(list)
+        for key, cached_mat in self._materials.items():
+            try:
+                keys_by_pointer[cached_mat.as_pointer()].append(key)
+            except (AttributeError, ReferenceError):
+                continue  # 空引用或已被删除的材质
+        
         for mat in duplicates:
-            for key in list(self._materials.keys()):
-                if self._materials[key] == mat:
-                    del self._materials[key]
-                    print(f"从管理器中移除: {key}")
+            for key in keys_by_pointer.get(mat.as_pointer(), ()):
+                del self._materials[key]
+                print(f"从管理器中移除: {key}")
         
         print(f"找到 {len(duplicates)} 个重复材质")
         return duplicates
     
     def reload_mapping_table(self, scene):
         """重新加载映射表（如果路径存在）"""
-        if scene.mapping_table_path and os.path.exists(scene.mapping_table_path):
-            print(f"重新加载映射表: {scene.mapping_table_path}")
-            self.set_mapping_table(scene.mapping_table_path)
+        settings = scene.block_generator_settings
+        if settings.mapping_table_path and os.path.exists(settings.mapping_table_path):
+            print(f"重新加载映射表: {settings.mapping_table_path}")
+            self.set_mapping_table(settings.mapping_table_path)
             return True
         else:
             print(f"无法重新加载映射表: 路径不存在或未设置")
             return False
-    
-    def get_unique_material_name(self, base_name):
-        """获取唯一的材质名称"""
-        if base_name not in bpy.data.materials:
-            return base_name
-        
-        counter = 1
-        while f"{base_name}.{str(counter).zfill(3)}" in bpy.data.materials:
-            counter += 1
-        
-        return f"{base_name}.{str(counter).zfill(3)}"
+
+# 单例在模块加载时取一次，热路径上直接使用，不再每次调用都经过 __new__/__init__
+_BLOCK_MANAGER = BlockModelManager()
 
 class ModelConfig:
     """模型配置信息"""
@@ -190,8 +353,14 @@ class ModelConfig:
         self.mapping_data = mapping_data
         self.texture_base_path = texture_base_path
         self.models_base_path = models_base_path
+        self._manager = _BLOCK_MANAGER
         
-        print(f"\n模型配置创建 - ID: {position_id}")
+        # 常用文件夹路径只拼接一次
+        self._id_folder_tex = os.path.join(texture_base_path, str(position_id))
+        self._id_folder_models = os.path.join(models_base_path, str(position_id))
+        self._models_folder = os.path.join(models_base_path, "models")
+        
+        log.debug("模型配置创建 - ID: %s", position_id)
         
         # 从映射数据中获取信息
         if mapping_data:
@@ -200,55 +369,51 @@ class ModelConfig:
             self.submodel_name = mapping_data.get('submodel_name', '')
             self.z_texture_prefix = mapping_data.get('z_texture_prefix', '')
             
-            print(f"  Blocktype: {self.blocktype}")
-            print(f"  主贴图前缀: {self.main_texture_prefix}")
-            print(f"  子模型名称: {self.submodel_name}")
-            print(f"  Z面贴图前缀: {self.z_texture_prefix}")
+            log.debug("  Blocktype: %s", self.blocktype)
+            log.debug("  主贴图前缀: %s", self.main_texture_prefix)
+            log.debug("  子模型名称: %s", self.submodel_name)
+            log.debug("  Z面贴图前缀: %s", self.z_texture_prefix)
         else:
             # 如果没有映射数据，使用空值
             self.blocktype = ''
             self.main_texture_prefix = ''
             self.submodel_name = ''
             self.z_texture_prefix = ''
-            print(f"  警告：没有找到位置ID {position_id} 的映射数据")
+            log.warning("没有找到位置ID %s 的映射数据", position_id)
         
         # 确定材质系统类型 - 修改：teamspawn类型使用独立材质系统
         if self.blocktype == 'teamspawn':
             # teamspawn类型：只使用一个材质球，贴图处理模型和正常数组相反
             self.material_system = 'teamspawn_system'
-        elif self.blocktype in ['soil', 'plantash']:
+        elif self.blocktype in _SOIL_TYPES:
             # soil类型：Z面特殊，其他面使用主贴图
             self.material_system = 'soil_system'
-        elif self.blocktype in ['minestone', 'stone', 'buildblueprint', 'regionreplicator', 'replicator', 'airwall', 'copier']:
-            # minestone类型：X、Y、Z面独立调配，每个面使用自己的贴图
-            self.material_system = 'minestone_system'
-        elif self.blocktype in ['replicator','regionreplicator','airwall', 'copier']:
-            # 检查是否有主贴图前缀
-            if self.main_texture_prefix:
-                # 有主贴图前缀，使用统一材质系统
-                self.material_system = 'minestone_system'  # 使用minestone系统，独立调配
-            else:
-                # 没有主贴图前缀，只创建子模型
+        elif self.blocktype in _MINESTONE_TYPES:
+            if self.blocktype in _SUBMODEL_ONLY_TYPES and not self.main_texture_prefix:
+                # replicator/airwall等类型没有主贴图前缀，只创建子模型
                 self.material_system = 'submodel_only'
+            else:
+                # minestone类型：X、Y、Z面独立调配，每个面使用自己的贴图
+                self.material_system = 'minestone_system'
         else:
             self.material_system = 'default_system'
         
-        print(f"  材质系统: {self.material_system}")
+        log.debug("  材质系统: %s", self.material_system)
         
         # 确定主模型和子模型路径
         if self.blocktype == 'teamspawn':
             # teamspawn类型使用id/teamspawn作为主模型
-            self.main_model_path = os.path.join(models_base_path, str(position_id), "teamspawn.obj")
-            print(f"  teamspawn类型：主模型路径设置为 {self.main_model_path}")
+            self.main_model_path = os.path.join(self._id_folder_models, "teamspawn.obj")
+            log.debug("  teamspawn类型：主模型路径设置为 %s", self.main_model_path)
             
             # teamspawn类型强制使用主模型，不使用子模型
             self.submodel_name = ''  # 清空子模型名称
             self.submodel_path = None
-            print(f"  teamspawn类型：强制使用主模型，不使用子模型")
+            log.debug("  teamspawn类型：强制使用主模型，不使用子模型")
         else:
             # 其他类型使用models/block.obj作为主模型
-            self.main_model_path = os.path.join(models_base_path, "models", "block.obj")
-            print(f"  普通类型：主模型路径设置为 {self.main_model_path}")
+            self.main_model_path = os.path.join(self._models_folder, "block.obj")
+            log.debug("  普通类型：主模型路径设置为 %s", self.main_model_path)
         
         self.submodel_path = None
         
@@ -260,85 +425,77 @@ class ModelConfig:
             # 有子模型名称，检查是否需要主模型
             if not self.main_texture_prefix:
                 self.need_main_model = False
-                print(f"  不需要主模型：有子模型但主贴图前缀为空")
+                log.debug("  不需要主模型：有子模型但主贴图前缀为空")
             else:
                 self.need_main_model = True
-                print(f"  需要主模型：有子模型且有主贴图前缀 {self.main_texture_prefix}")
+                log.debug("  需要主模型：有子模型且有主贴图前缀 %s", self.main_texture_prefix)
         else:
             # 没有子模型名称，检查是否需要主模型
             if self.main_texture_prefix:
                 self.need_main_model = True
-                print(f"  需要主模型：有主贴图前缀 {self.main_texture_prefix}")
+                log.debug("  需要主模型：有主贴图前缀 %s", self.main_texture_prefix)
             else:
                 self.need_main_model = False
-                print(f"  不需要主模型：没有子模型且没有主贴图前缀")
+                log.debug("  不需要主模型：没有子模型且没有主贴图前缀")
         
         # 特殊处理：对于只创建子模型的类型，强制设置need_main_model=False
         if self.material_system == 'submodel_only':
             self.need_main_model = False
-            print(f"  强制不需要主模型：{self.blocktype}类型只创建子模型")
+            log.debug("  强制不需要主模型：%s类型只创建子模型", self.blocktype)
         
         # 特殊处理：teamspawn类型强制使用主模型，不使用子模型
         if self.blocktype == 'teamspawn':
             self.need_main_model = True
             self.submodel_name = ''  # 清空子模型名称
             self.submodel_path = None
-            print(f"  特殊处理：teamspawn类型强制使用主模型，使用id/teamspawn.obj")
+            log.debug("  特殊处理：teamspawn类型强制使用主模型，使用id/teamspawn.obj")
         
         # 查找子模型路径
         if self.submodel_name and self.blocktype != 'teamspawn':  # teamspawn类型跳过子模型查找
-            # 尝试在id文件夹中查找子模型
-            id_folder = os.path.join(models_base_path, str(position_id))
+            # 先在id文件夹、再在models文件夹中查找子模型（查OBJ索引）
             submodel_name = self.submodel_name
-            
-            # 查找子模型文件
-            possible_names = [
-                f"{submodel_name}.obj",
-                f"{submodel_name}_lod1.obj",
-                f"{submodel_name}_lod0.obj",
-            ]
-            
-            for name in possible_names:
-                path = os.path.join(id_folder, name)
-                if os.path.exists(path):
-                    self.submodel_path = path
-                    print(f"  找到子模型文件: {path}")
-                    break
-            
-            # 如果没找到，尝试在models文件夹中查找
-            if not self.submodel_path:
-                for name in possible_names:
-                    path = os.path.join(models_base_path, "models", name)
-                    if os.path.exists(path):
-                        self.submodel_path = path
-                        print(f"  在models文件夹找到子模型文件: {path}")
-                        break
+            self.submodel_path = self._manager.find_obj(models_base_path, position_id, submodel_name)
+            if self.submodel_path:
+                log.debug("  找到子模型文件: %s", self.submodel_path)
             
             if not self.submodel_path:
-                print(f"  警告：未找到子模型文件 {submodel_name}.obj")
+                log.warning("未找到子模型文件 %s.obj", submodel_name)
         else:
-            print(f"  无子模型名称，跳过子模型查找")
+            log.debug("  无子模型名称，跳过子模型查找")
+        
+        # 贴图路径只由 (位置ID, 面) 决定，一次解析好X/Y/Z三个面
+        self._texture_paths = {face: self._resolve_texture_path(face) for face in ('x', 'y', 'z')}
     
     def has_main_model(self):
         """是否需要主模型"""
         # 对于teamspawn类型，检查id/teamspawn.obj是否存在
         if self.blocktype == 'teamspawn':
-            return self.need_main_model and os.path.exists(self.main_model_path)
+            return self.need_main_model and _exists(self.main_model_path)
         else:
-            return self.need_main_model and os.path.exists(self.main_model_path)
+            return self.need_main_model and _exists(self.main_model_path)
     
     def has_submodel(self):
         """是否需要子模型"""
         # teamspawn类型不需要子模型
         if self.blocktype == 'teamspawn':
             return False
-        return self.submodel_path and os.path.exists(self.submodel_path)
+        return self.submodel_path and _exists(self.submodel_path)
     
     def get_texture_path(self, face_type='x'):
-        """获取贴图路径 - 根据材质系统决定使用哪种UV系统"""
+        """获取贴图路径 - X/Y/Z面直接查预解析表"""
+        face_type = face_type.lower()
+        if face_type in self._texture_paths:
+            return self._texture_paths[face_type]
+        return self._resolve_texture_path(face_type)
+    
+    def _resolve_texture_path(self, face_type='x'):
+        """解析贴图路径 - 根据材质系统决定使用哪种UV系统"""
         if not self.main_texture_prefix:
             return None
         
+        # 统一转小写一次，下面各贴图查找函数直接使用
+        face_type = face_type.lower()
+        
         # 根据材质系统判断使用哪种材质系统
         if self.material_system == 'teamspawn_system':
             # teamspawn类型：只使用一个材质球，贴图处理模型和正常数组相反
@@ -356,73 +513,65 @@ class ModelConfig:
             # 默认：标准XYZ面贴图
             return self._get_default_texture_path(face_type)
     
+    def _find_first(self, folder, names):
+        """按优先级返回folder中第一个存在的文件路径（整个文件夹只列一次目录）"""
+        entries = self._manager.files_in(folder)
+        for name in names:
+            if os.path.normcase(name) in entries:
+                return os.path.join(folder, name)
+        return None
+    
     def _get_default_texture_path(self, face_type='x'):
         """默认贴图路径（标准XYZ面）"""
-        id_folder = os.path.join(self.texture_base_path, str(self.position_id))
+        id_folder = self._id_folder_tex
         
         # 标准硬链接文件名规则
-        if face_type.lower() == 'x':
-            expected_filename = f"{self.main_texture_prefix}_z.png"
-        elif face_type.lower() == 'y':
-            expected_filename = f"{self.main_texture_prefix}_x.png"
-        elif face_type.lower() == 'z':
-            expected_filename = f"{self.main_texture_prefix}_y.png"
-        else:
-            expected_filename = f"{self.main_texture_prefix}_{face_type}.png"
+        suffix = _FACE_TEXTURE_SUFFIX.get(face_type, f"_{face_type}")
+        expected_filename = f"{self.main_texture_prefix}{suffix}.png"
         
         # 构建完整路径
         path = os.path.join(id_folder, expected_filename)
-        if os.path.exists(path):
+        if self._manager.file_exists(path):
             return path
         
         return None
     
     def _get_minestone_texture_path(self, face_type='x'):
         """minestone类型贴图路径（X、Y、Z面独立，每个面使用自己的贴图）"""
-        id_folder = os.path.join(self.texture_base_path, str(self.position_id))
-        
-        # minestone类型各面独立，根据face_type使用不同的贴图
-        if face_type.lower() == 'x':
-            # X面贴图
-            expected_filename = f"{self.main_texture_prefix}_z.png"
-        elif face_type.lower() == 'y':
-            # Y面贴图
-            expected_filename = f"{self.main_texture_prefix}_x.png"
-        elif face_type.lower() == 'z':
-            # Z面贴图
-            expected_filename = f"{self.main_texture_prefix}_y.png"
-        else:
-            # 其他面使用默认贴图
-            expected_filename = f"{self.main_texture_prefix}.png"
+        id_folder = self._id_folder_tex
+        
+        # minestone类型各面独立，根据face_type使用不同的贴图；其他面使用默认贴图
+        suffix = _FACE_TEXTURE_SUFFIX.get(face_type, "")
+        expected_filename = f"{self.main_texture_prefix}{suffix}.png"
         
         path = os.path.join(id_folder, expected_filename)
         
-        if os.path.exists(path):
+        if self._manager.file_exists(path):
             return path
         
         # 如果没找到特定贴图，尝试使用主贴图作为后备
         fallback_path = os.path.join(id_folder, f"{self.main_texture_prefix}.png")
-        if os.path.exists(fallback_path):
+        if self._manager.file_exists(fallback_path):
             return fallback_path
         
         return None
     
     def _get_soil_texture_path(self, face_type='x'):
         """soil类型贴图路径（Z面特殊，其他面使用主贴图）"""
-        id_folder = os.path.join(self.texture_base_path, str(self.position_id))
+        id_folder = self._id_folder_tex
         
-        print(f"  查找{face_type}面贴图 - ID: {self.position_id}, 主贴图前缀: {self.main_texture_prefix}, Z面贴图前缀: {self.z_texture_prefix}")
+        log.debug("  查找%s面贴图 - ID: %s, 主贴图前缀: %s, Z面贴图前缀: %s", face_type, self.position_id, self.main_texture_prefix, self.z_texture_prefix)
         
-        if face_type.lower() == 'z':
+        if face_type == 'z':
             # Z面使用特殊贴图（如果有的话）
             if self.z_texture_prefix:
                 expected_filename = f"{self.z_texture_prefix}.png"
                 path = os.path.join(id_folder, expected_filename)
-                if os.path.exists(path):
-                    print(f"    ✓ 找到Z面特殊贴图: {expected_filename}")
+                if self._manager.file_exists(path):
+                    log.debug("    ✓ 找到Z面特殊贴图: %s", expected_filename)
                     return path
                 else:
-                    print(f"    ✗ Z面特殊贴图不存在: {path}")
+                    log.debug("    ✗ Z面特殊贴图不存在: %s", path)
             
             # 如果没有特殊Z面贴图，尝试其他命名
             possible_names = [
@@ -433,19 +582,18 @@ class ModelConfig:
                 "blockd.grass.png",  # 尝试默认草地贴图
             ]
             
-            for name in possible_names:
-                path = os.path.join(id_folder, name)
-                if os.path.exists(path):
-                    print(f"    ✓ 找到Z面替代贴图: {name}")
-                    return path
+            path = self._find_first(id_folder, possible_names)
+            if path:
+                log.debug("    ✓ 找到Z面替代贴图: %s", path)
+                return path
             
-            print(f"    ✗ 未找到Z面贴图")
+            log.debug("    ✗ 未找到Z面贴图")
         else:
             # X、-X、Y、-Y、-Z面使用主贴图
             expected_filename = f"{self.main_texture_prefix}.png"
             path = os.path.join(id_folder, expected_filename)
-            if os.path.exists(path):
-                print(f"    ✓ 找到{face_type}面主贴图: {expected_filename}")
+            if self._manager.file_exists(path):
+                log.debug("    ✓ 找到%s面主贴图: %s", face_type, expected_filename)
                 return path
             
             # 尝试其他可能的命名
@@ -456,28 +604,27 @@ class ModelConfig:
                 "blockd.grass.png",
             ]
             
-            for name in other_names:
-                path = os.path.join(id_folder, name)
-                if os.path.exists(path):
-                    print(f"    ✓ 找到{face_type}面替代贴图: {name}")
-                    return path
+            path = self._find_first(id_folder, other_names)
+            if path:
+                log.debug("    ✓ 找到%s面替代贴图: %s", face_type, path)
+                return path
             
-            print(f"    ✗ 未找到{face_type}面贴图")
+            log.debug("    ✗ 未找到%s面贴图", face_type)
         
         return None
     
     def _get_teamspawn_texture_path(self):
         """teamspawn类型贴图路径（只使用一个贴图，贴图处理模型和正常数组相反）"""
-        id_folder = os.path.join(self.texture_base_path, str(self.position_id))
+        id_folder = self._id_folder_tex
         
-        print(f"  查找teamspawn贴图 - ID: {self.position_id}, 主贴图前缀: {self.main_texture_prefix}")
+        log.debug("  查找teamspawn贴图 - ID: %s, 主贴图前缀: %s", self.position_id, self.main_texture_prefix)
         
         # teamspawn类型只需要一个贴图，使用主贴图前缀
         expected_filename = f"{self.main_texture_prefix}.png"
         path = os.path.join(id_folder, expected_filename)
         
-        if os.path.exists(path):
-            print(f"    ✓ 找到teamspawn贴图: {expected_filename}")
+        if self._manager.file_exists(path):
+            log.debug("    ✓ 找到teamspawn贴图: %s", expected_filename)
             return path
         
         # 如果没找到，尝试其他可能的命名
@@ -489,13 +636,12 @@ class ModelConfig:
             "teamspawn0.png",
         ]
         
-        for name in possible_names:
-            path = os.path.join(id_folder, name)
-            if os.path.exists(path):
-                print(f"    ✓ 找到teamspawn替代贴图: {name}")
-                return path
+        path = self._find_first(id_folder, possible_names)
+        if path:
+            log.debug("    ✓ 找到teamspawn替代贴图: %s", path)
+            return path
         
-        print(f"    ✗ 未找到teamspawn贴图")
+        log.debug("    ✗ 未找到teamspawn贴图")
         return None
     
     def get_submodel_texture_path(self):
@@ -507,25 +653,25 @@ class ModelConfig:
         possible_paths = []
         
         # 1. 在id文件夹中查找
-        id_folder = os.path.join(self.texture_base_path, str(self.position_id))
+        id_folder = self._id_folder_tex
         possible_paths.append(os.path.join(id_folder, f"{self.submodel_name}.png"))
         
         # 2. 在texture_base_path根目录下查找
         possible_paths.append(os.path.join(self.texture_base_path, f"{self.submodel_name}.png"))
         
         # 3. 在models文件夹中查找
-        models_folder = os.path.join(self.models_base_path, "models")
+        models_folder = self._models_folder
         possible_paths.append(os.path.join(models_folder, f"{self.submodel_name}.png"))
         
         # 4. 在id文件夹中的models子文件夹中查找
         possible_paths.append(os.path.join(id_folder, "models", f"{self.submodel_name}.png"))
         
         for path in possible_paths:
-            if os.path.exists(path):
-                print(f"✓ 找到子模型漫反射贴图: {path}")
+            if self._manager.file_exists(path):
+                log.debug("✓ 找到子模型漫反射贴图: %s", path)
                 return path
         
-        print(f"✗ 未找到子模型漫反射贴图: {self.submodel_name}.png")
+        log.debug("✗ 未找到子模型漫反射贴图: %s.png", self.submodel_name)
         return None
     
     def get_submodel_emission_texture_path(self):
@@ -537,7 +683,7 @@ class ModelConfig:
         possible_paths = []
         
         # 1. 在id文件夹中查找
-        id_folder = os.path.join(self.texture_base_path, str(self.position_id))
+        id_folder = self._id_folder_tex
         possible_paths.append(os.path.join(id_folder, f"{self.submodel_name}_emi.png"))
         possible_paths.append(os.path.join(id_folder, f"{self.submodel_name}_emission.png"))
         possible_paths.append(os.path.join(id_folder, f"{self.submodel_name}_emit.png"))
@@ -548,27 +694,45 @@ class ModelConfig:
         possible_paths.append(os.path.join(self.texture_base_path, f"{self.submodel_name}_emi.png"))
         
         # 3. 在models文件夹中查找
-        models_folder = os.path.join(self.models_base_path, "models")
+        models_folder = self._models_folder
         possible_paths.append(os.path.join(models_folder, f"{self.submodel_name}_emi.png"))
         
         # 4. 在id文件夹中的models子文件夹中查找
         possible_paths.append(os.path.join(id_folder, "models", f"{self.submodel_name}_emi.png"))
         
         for path in possible_paths:
-            if os.path.exists(path):
-                print(f"✓ 找到子模型自发光贴图: {path}")
+            if self._manager.file_exists(path):
+                log.debug("✓ 找到子模型自发光贴图: %s", path)
                 return path
         
-        print(f"✗ 未找到子模型自发光贴图: {self.submodel_name}_emi.png")
+        log.debug("✗ 未找到子模型自发光贴图: %s_emi.png", self.submodel_name)
         return None
+    
+    def get_all_texture_paths(self):
+        """该位置ID可能用到的全部贴图路径（用于预读）"""
+        paths = set(self._texture_paths.values())
+        if self.blocktype == 'teamspawn':
+            paths.add(self._get_teamspawn_texture_path())
+        paths.add(self.get_submodel_texture_path())
+        paths.add(self.get_submodel_emission_texture_path())
+        paths.discard(None)
+        return paths
 
 # ============================================================================
 # 坐标解析函数
 # ============================================================================
 
-def parse_coordinate_string(coord_str):
-    """解析坐标字符串，支持多种格式 - 支持新格式: x,y,z,id"""
-    coordinates = []
+# 坐标以列存储（SoA）：四个等长的int32数组
+Coordinates = namedtuple('Coordinates', 'ids x y z')
+
+def _empty_coordinates():
+    """返回空坐标集"""
+    empty = np.zeros(0, dtype=np.int32)
+    return Coordinates(empty, empty, empty, empty)
+
+def _parse_coordinate_lines(coord_str):
+    """逐行解析坐标字符串（快速路径失败时的回退）"""
+    ids, xs, ys, zs = [], [], [], []
     
     lines = coord_str.strip().split('\n')
     
@@ -579,75 +743,164 @@ def parse_coordinate_string(coord_str):
             continue
         
         try:
-            # 支持新格式: x,y,z,id
+            # 支持新格式: x,y,z,id 以及空格分隔
             if ',' in line:
                 parts = [p.strip() for p in line.split(',')]
-                
-                if len(parts) == 4:
-                    # 新格式: x,y,z,id
-                    x = float(parts[0])
-                    y = float(parts[1])
-                    z = float(parts[2])
-                    block_id = int(parts[3])  # 新格式中id在最后
-                    coordinates.append({
-                        'id': block_id,
-                        'x': int(round(x)),
-                        'y': int(round(y)),
-                        'z': int(round(z))
-                    })
-                elif len(parts) == 3:
-                    # 格式: x,y,z (默认id为0)
-                    x = float(parts[0])
-                    y = float(parts[1])
-                    z = float(parts[2])
-                    coordinates.append({
-                        'id': 0,
-                        'x': int(round(x)),
-                        'y': int(round(y)),
-                        'z': int(round(z))
-                    })
-                else:
-                    print(f"跳过无效行（字段数不正确）: {line}")
-            
-            # 支持空格分隔
             elif ' ' in line:
-                parts = re.split(r'\s+', line.strip())
-                if len(parts) == 4:
-                    # 新格式: x y z id
-                    x = float(parts[0])
-                    y = float(parts[1])
-                    z = float(parts[2])
-                    block_id = int(parts[3])  # 新格式中id在最后
-                    coordinates.append({
-                        'id': block_id,
-                        'x': int(round(x)),
-                        'y': int(round(y)),
-                        'z': int(round(z))
-                    })
-                elif len(parts) == 3:
-                    x = float(parts[0])
-                    y = float(parts[1])
-                    z = float(parts[2])
-                    coordinates.append({
-                        'id': 0,
-                        'x': int(round(x)),
-                        'y': int(round(y)),
-                        'z': int(round(z))
-                    })
-                else:
-                    print(f"跳过无效行（字段数不正确）: {line}")
+                parts = _WS_RE.split(line)
+            else:
+                continue
+            
+            if len(parts) == 4:
+                # 新格式: x,y,z,id
+                block_id = int(parts[3])  # 新格式中id在最后
+            elif len(parts) == 3:
+                # 格式: x,y,z (默认id为0)
+                block_id = 0
+            else:
+                print(f"跳过无效行（字段数不正确）: {line}")
+                continue
+            
+            x = int(round(float(parts[0])))
+            y = int(round(float(parts[1])))
+            z = int(round(float(parts[2])))
+            
+            ids.append(block_id)
+            xs.append(x)
+            ys.append(y)
+            zs.append(z)
                     
-        except (ValueError, IndexError) as e:
+        except (ValueError, IndexError, OverflowError) as e:
             print(f"第 {line_num + 1} 行解析错误: {line} - {str(e)}")
             continue
     
-    print(f"坐标解析完成，共解析 {len(coordinates)} 个坐标")
+    return Coordinates(
+        np.asarray(ids, dtype=np.int32),
+        np.asarray(xs, dtype=np.int32),
+        np.asarray(ys, dtype=np.int32),
+        np.asarray(zs, dtype=np.int32)
+    )
+
+def _parse_coordinate_array(coord_str):
+    """用numpy一次性解析整个坐标缓冲区，返回 (N,4) 的 x,y,z,id 数组；格式不规整时返回None"""
+    delimiter = ',' if ',' in coord_str else None
+    # 逐行解析只在行内有空格时按空白切分，只用制表符分隔的行会被跳过；保持这一规则，交给逐行解析
+    if delimiter is None and '\t' in coord_str:
+        return None
+    
+    try:
+        arr = np.loadtxt(io.StringIO(coord_str), delimiter=delimiter, comments='#',
+                         dtype=np.float64, ndmin=2)
+    except ValueError:
+        return None
+    
+    if arr.shape[1] == 3:
+        # 格式: x,y,z (默认id为0)
+        arr = np.hstack((arr, np.zeros((arr.shape[0], 1))))
+    elif arr.shape[1] != 4:
+        return None
+    
+    # nan/inf无法取整成坐标，逐行解析会跳过这些行
+    if not np.isfinite(arr).all():
+        return None
+    
+    # id必须是整数，否则交给逐行解析器处理（与原逻辑一致：跳过该行）
+    if not np.array_equal(arr[:, 3], np.trunc(arr[:, 3])):
+        return None
+    
+    return arr
+
+# 坐标解析缓存：原始字符串 -> Coordinates；导入、生成和面板绘制解析的是同一份文本
+# 按文本内容而非场景作键，多个场景各自的坐标文本可以同时留在缓存里
+_COORD_CACHE = {}
+_COORD_CACHE_MAX = 4
+
+def parse_coordinate_string(coord_str):
+    """解析坐标字符串，返回Coordinates(ids, x, y, z) - 支持新格式: x,y,z,id"""
+    if not coord_str.strip():
+        return _empty_coordinates()
+    
+    # 文本未变时直接复用（对字符串做哈希和比较远比重新解析便宜）
+    cached = _COORD_CACHE.get(coord_str)
+    if cached is not None:
+        # 命中后移到末尾，淘汰时按最近最少使用
+        _COORD_CACHE[coord_str] = _COORD_CACHE.pop(coord_str)
+        return cached
+    
+    arr = _parse_coordinate_array(coord_str)
+    if arr is None:
+        coordinates = _parse_coordinate_lines(coord_str)
+    else:
+        xyz = np.rint(arr[:, :3]).astype(np.int32)
+        coordinates = Coordinates(
+            arr[:, 3].astype(np.int32),
+            np.ascontiguousarray(xyz[:, 0]),
+            np.ascontiguousarray(xyz[:, 1]),
+            np.ascontiguousarray(xyz[:, 2])
+        )
+    
+    for column in coordinates:
+        column.flags.writeable = False  # 缓存值共享，禁止调用方原地修改
+    if len(_COORD_CACHE) >= _COORD_CACHE_MAX:
+        del _COORD_CACHE[next(iter(_COORD_CACHE))]
+    _COORD_CACHE[coord_str] = coordinates
+    
+    print(f"坐标解析完成，共解析 {coordinates.ids.size} 个坐标")
     return coordinates
 
 # ============================================================================
 # 映射表解析函数
 # ============================================================================
 
+# 映射表中用到的字段索引，以及一行至少需要的字段数
+_MAPPING_FIELD_INDICES = (0, 6, 43, 44)
+_MAPPING_MIN_FIELDS = 46
+
+def _parse_mapping_table_pandas(mapping_file_path):
+    """用pandas的C解析器只读取需要的列；pandas不可用或表中有无效行时返回None，交给逐行解析"""
+    if pd is None:
+        return None
+    
+    # 额外读取第46列：read_csv会用空值补齐字段不足的行，这一列只把空字符串当作缺失值，
+    # 补齐出来的行就是NaN。'='之后的内容当作注释，'='开头的行整行跳过
+    last_col = _MAPPING_MIN_FIELDS - 1
+    try:
+        df = pd.read_csv(mapping_file_path, header=None, usecols=list(_MAPPING_FIELD_INDICES) + [last_col],
+                         dtype=str, keep_default_na=False, na_values={last_col: ['']},
+                         quoting=csv.QUOTE_NONE, encoding='utf-8', comment='=')
+    except Exception as e:
+        log.debug("pandas解析映射表失败，回退到逐行解析: %s", e)
+        return None
+    
+    # 有无效行时回退，由逐行解析按物理行号打印诊断信息（注释行已被跳过，这里拿不到行号）
+    # 第46个字段本身为空、或字段中间出现'='被截短的行也会回退，结果仍以逐行解析为准
+    if df[last_col].isna().any():
+        log.debug("映射表中有字段不足的行，回退到逐行解析")
+        return None
+    
+    mapping = {}
+    ids_col, type_col, main_col, sub_col = (df[i].tolist() for i in _MAPPING_FIELD_INDICES)
+    for raw_id, blocktype, main_texture_prefix, submodel_name in zip(ids_col, type_col, main_col, sub_col):
+        try:
+            position_id = int(raw_id)
+        except ValueError:
+            log.debug("映射表中有无效的位置ID %r，回退到逐行解析", raw_id)
+            return None
+        
+        mapping[position_id] = {
+            'position_id': position_id,
+            'blocktype': blocktype,
+            'main_texture_prefix': main_texture_prefix,
+            'submodel_name': submodel_name,
+            'z_texture_prefix': submodel_name,
+            'has_main_texture': main_texture_prefix != '',
+            'has_submodel': submodel_name != '',
+            'has_z_texture': submodel_name != '',
+        }
+    
+    print(f"映射表解析完成(pandas): 有效行={len(df)}, 无效行=0, 总条目={len(mapping)}")
+    return mapping
+
 def parse_mapping_table(mapping_file_path):
     """解析映射表文件 - 兼容新格式"""
     mapping = {}
@@ -656,60 +909,56 @@ def parse_mapping_table(mapping_file_path):
         print(f"映射表文件不存在: {mapping_file_path}")
         return mapping
     
+    fast_mapping = _parse_mapping_table_pandas(mapping_file_path)
+    if fast_mapping is not None:
+        return fast_mapping
+    
     try:
-        with open(mapping_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
         valid_lines = 0
         invalid_lines = 0
         
-        for line_num, line in enumerate(lines):
-            line = line.strip()
-            if not line or line.startswith('='):
-                continue
-            
-            parts = line.split(',')
-            if len(parts) < 46:  # 确保有足够的字段
-                print(f"跳过无效行（字段不足）行 {line_num+1}: {line}")
-                invalid_lines += 1
-                continue
-            
-            try:
-                position_id = int(parts[0])
-                blocktype = parts[6] if len(parts) > 6 else ''           # 第7个字段（索引6）
-                main_texture_prefix = parts[43] if len(parts) > 43 else ''  # 第44个字段（索引43）
-                submodel_name = parts[44] if len(parts) > 44 else ''       # 第45个字段（索引44）
-                z_texture_prefix = parts[44] if len(parts) > 44 else ''    # 第45个字段（索引44）
+        # 逐行流式读取，不一次性把整个文件读入内存
+        with open(mapping_file_path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f):
+                line = line.strip()
+                if not line or line.startswith('='):
+                    continue
+                
+                # 只切出前46个字段，行尾剩下的部分整体留在最后一项里
+                parts = line.split(',', _MAPPING_MIN_FIELDS)
+                if len(parts) < _MAPPING_MIN_FIELDS:  # 确保有足够的字段
+                    print(f"跳过无效行（字段不足）行 {line_num+1}: {line}")
+                    invalid_lines += 1
+                    continue
                 
-                # 特殊处理：如果第46个字段包含多个值，可能是"hupo,hupo1"格式
-                if ',' in main_texture_prefix:
-                    # 分割成主贴图前缀和Z面贴图前缀
-                    split_parts = main_texture_prefix.split(',')
-                    main_texture_prefix = split_parts[0] if len(split_parts) > 0 else ''
-                    if len(split_parts) > 1:
-                        z_texture_prefix = split_parts[1]
+                try:
+                    position_id = int(parts[0])
+                    blocktype = parts[6]               # 第7个字段（索引6）
+                    main_texture_prefix = parts[43]    # 第44个字段（索引43）
+                    submodel_name = parts[44]          # 第45个字段（索引44）
+                    z_texture_prefix = parts[44]       # 第45个字段（索引44）
                 
-                mapping[position_id] = {
-                    'position_id': position_id,
-                    'blocktype': blocktype,
-                    'main_texture_prefix': main_texture_prefix,
-                    'submodel_name': submodel_name,
-                    'z_texture_prefix': z_texture_prefix,
-                    'has_main_texture': main_texture_prefix != '',
-                    'has_submodel': submodel_name != '',
-                    'has_z_texture': z_texture_prefix != '',
-                    'all_parts': parts  # 保留所有字段
-                }
+                    mapping[position_id] = {
+                        'position_id': position_id,
+                        'blocktype': blocktype,
+                        'main_texture_prefix': main_texture_prefix,
+                        'submodel_name': submodel_name,
+                        'z_texture_prefix': z_texture_prefix,
+                        'has_main_texture': main_texture_prefix != '',
+                        'has_submodel': submodel_name != '',
+                        'has_z_texture': z_texture_prefix != '',
+                    }
                 
-                valid_lines += 1
+                    valid_lines += 1
                 
-                print(f"解析映射行 {line_num+1}: ID={position_id}, Blocktype={blocktype}, "
-                      f"主贴图={main_texture_prefix}, 子模型={submodel_name}, Z面贴图={z_texture_prefix}")
+                    log.debug("解析映射行 %d: ID=%s, Blocktype=%s, 主贴图=%s, 子模型=%s, Z面贴图=%s",
+                              line_num + 1, position_id, blocktype, main_texture_prefix,
+                              submodel_name, z_texture_prefix)
                 
-            except (ValueError, IndexError) as e:
-                print(f"解析行时出错 {line_num+1}: {line} - {e}")
-                invalid_lines += 1
-                continue
+                except (ValueError, IndexError) as e:
+                    print(f"解析行时出错 {line_num+1}: {line} - {e}")
+                    invalid_lines += 1
+                    continue
                 
         print(f"映射表解析完成: 有效行={valid_lines}, 无效行={invalid_lines}, 总条目={len(mapping)}")
                 
@@ -725,66 +974,78 @@ def parse_mapping_table(mapping_file_path):
 
 def calculate_scaling_factor(original_size, scale_mode, custom_scale_factor=1.0, base_block_size=1.0):
     """根据缩放模式计算缩放因子"""
-    print(f"计算缩放因子: 原始尺寸={original_size:.6f}, 缩放模式={scale_mode}, 基础网格大小={base_block_size}")
+    log.debug("计算缩放因子: 原始尺寸=%.6f, 缩放模式=%s, 基础网格大小=%s", original_size, scale_mode, base_block_size)
     
     if scale_mode == 'ONE_METER':
         # 缩放到基础网格大小（通常是1米）
         if original_size > 0.001:
             factor = base_block_size / original_size
-            print(f"  ONE_METER模式缩放因子: {factor:.6f}")
+            log.debug("  ONE_METER模式缩放因子: %.6f", factor)
             return factor
         else:
-            print(f"  ONE_METER模式: 原始尺寸过小，使用默认因子1.0")
+            log.debug("  ONE_METER模式: 原始尺寸过小，使用默认因子1.0")
             return 1.0
     elif scale_mode == 'CUSTOM':
         # 使用自定义缩放因子
-        print(f"  CUSTOM模式缩放因子: {custom_scale_factor:.6f}")
+        log.debug("  CUSTOM模式缩放因子: %.6f", custom_scale_factor)
         return custom_scale_factor
     else:  # 'ORIGINAL'
         # 保持原始比例
-        print(f"  ORIGINAL模式缩放因子: 1.0")
+        log.debug("  ORIGINAL模式缩放因子: 1.0")
         return 1.0
 
+# 方向模式 -> 旋转角度（弧度）/ 方向向量
+_DIRECTION_ROTATIONS = {
+    'EAST': 0.0,                # 朝向东方，不旋转
+    'SOUTH': math.pi / 2,       # 朝向南方，旋转90度
+    'WEST': math.pi,            # 朝向西方，旋转180度
+    'NORTH': 3 * math.pi / 2,   # 朝向北方，旋转270度
+}
+
+_DIRECTION_VECTORS = {
+    'EAST': Vector((1.0, 0.0, 0.0)).freeze(),
+    'SOUTH': Vector((0.0, -1.0, 0.0)).freeze(),
+    'WEST': Vector((-1.0, 0.0, 0.0)).freeze(),
+    'NORTH': Vector((0.0, 1.0, 0.0)).freeze(),
+}
+
 def get_rotation_for_direction(direction_mode):
     """根据方向模式获取旋转角度（弧度）"""
-    if direction_mode == 'EAST':
-        return 0.0  # 朝向东方，不旋转
-    elif direction_mode == 'SOUTH':
-        return math.pi / 2  # 朝向南方，旋转90度
-    elif direction_mode == 'WEST':
-        return math.pi  # 朝向西方，旋转180度
-    elif direction_mode == 'NORTH':
-        return 3 * math.pi / 2  # 朝向北方，旋转270度
-    else:
-        return 0.0
+    return _DIRECTION_ROTATIONS.get(direction_mode, 0.0)
 
 def get_direction_vector(direction_mode):
-    """根据方向模式获取方向向量"""
-    if direction_mode == 'EAST':
-        return Vector((1.0, 0.0, 0.0))
-    elif direction_mode == 'SOUTH':
-        return Vector((0.0, -1.0, 0.0))
-    elif direction_mode == 'WEST':
-        return Vector((-1.0, 0.0, 0.0))
-    elif direction_mode == 'NORTH':
-        return Vector((0.0, 1.0, 0.0))
+    """根据方向模式获取方向向量（只读，需修改时请copy）"""
+    return _DIRECTION_VECTORS.get(direction_mode, _DIRECTION_VECTORS['EAST'])
+
+_IDENTITY_3X3 = np.eye(3)
+
+def _bbox_world(obj):
+    """计算对象世界坐标系下的轴对齐边界框，返回 (mn, mx) 两个长度为3的数组"""
+    # bound_box的第0个和第6个角点就是局部包围盒的最小/最大点
+    bound_box = obj.bound_box
+    local = np.array((bound_box[0], bound_box[6]), dtype=np.float64)
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    
+    rotation = matrix[:3, :3]
+    translation = matrix[:3, 3]
+    if np.array_equal(rotation, _IDENTITY_3X3):
+        # 只有平移（模板/导入后应用过变换的常见情况）：直接平移局部包围盒
+        return local[0] + translation, local[1] + translation
     else:
-        return Vector((1.0, 0.0, 0.0))
+        # Arvo包围盒变换：每个矩阵元素分别乘局部最小/最大值，按行取小/取大后求和，
+        # 不需要变换8个角点再逐个比较
+        from_min = rotation * local[0]
+        from_max = rotation * local[1]
+        return (translation + np.minimum(from_min, from_max).sum(axis=1),
+                translation + np.maximum(from_min, from_max).sum(axis=1))
 
 def calculate_model_dimensions(obj):
     """计算模型的尺寸"""
     if obj.type != 'MESH':
         return 0.0, 0.0, 0.0, 0.0
     
-    # 获取世界坐标系下的边界框
-    bbox_corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
-    x_coords = [corner.x for corner in bbox_corners]
-    y_coords = [corner.y for corner in bbox_corners]
-    z_coords = [corner.z for corner in bbox_corners]
-    
-    size_x = max(x_coords) - min(x_coords)
-    size_y = max(y_coords) - min(y_coords)
-    size_z = max(z_coords) - min(z_coords)
+    mn, mx = _bbox_world(obj)
+    size_x, size_y, size_z = (mx - mn).tolist()
     max_size = max(size_x, size_y, size_z)
     
     return size_x, size_y, size_z, max_size
@@ -794,17 +1055,41 @@ def calculate_model_center(obj):
     if obj.type != 'MESH':
         return Vector((0, 0, 0))
     
-    # 获取世界坐标系下的边界框
-    bbox_corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
-    x_coords = [corner.x for corner in bbox_corners]
-    y_coords = [corner.y for corner in bbox_corners]
-    z_coords = [corner.z for corner in bbox_corners]
+    mn, mx = _bbox_world(obj)
+    return Vector(((mn + mx) / 2).tolist())
+
+def make_placement_fn(base_block_size, model_size_x, model_size_y, model_size_z,
+                      adjacent_mode=True, use_model_center=False):
+    """按定位设置返回专用的坐标换算函数，循环内不再判断模式"""
+    if adjacent_mode:
+        # 相邻模式：根据模型实际尺寸计算位置（Z轴也使用模型尺寸）
+        step_x, step_y, step_z = model_size_x, model_size_y, model_size_z
+    else:
+        # 非相邻模式：使用基础网格大小
+        step_x = step_y = step_z = base_block_size
     
-    center_x = (min(x_coords) + max(x_coords)) / 2
-    center_y = (min(y_coords) + max(y_coords)) / 2
-    center_z = (min(z_coords) + max(z_coords)) / 2
+    if use_model_center:
+        # 模型中心对齐：需要将模型中心放在计算的位置上
+        half_z = model_size_z / 2
+        return lambda x, y, z: (x * step_x, y * step_y, z * step_z + half_z)
     
-    return Vector((center_x, center_y, center_z))
+    # 模型底部对齐：将模型底部放在网格平面上
+    return lambda x, y, z: (x * step_x, y * step_y, z * step_z)
+
+# 换算函数按参数缓存，同一模板的方块复用同一个闭包
+_PLACEMENT_FNS = {}
+
+def get_placement_fn(base_block_size, model_size_x, model_size_y, model_size_z,
+                     adjacent_mode=True, use_model_center=False):
+    """获取（缓存的）坐标换算函数"""
+    key = (base_block_size, model_size_x, model_size_y, model_size_z,
+           bool(adjacent_mode), bool(use_model_center))
+    place = _PLACEMENT_FNS.get(key)
+    if place is None:
+        if len(_PLACEMENT_FNS) >= 1024:
+            _PLACEMENT_FNS.clear()
+        place = _PLACEMENT_FNS[key] = make_placement_fn(*key)
+    return place
 
 def get_world_coordinate_for_model(grid_coord, base_block_size, model_size_x, model_size_y, model_size_z, 
                                    direction_mode='EAST', use_model_center=False, adjacent_mode=True):
@@ -812,48 +1097,46 @@ def get_world_coordinate_for_model(grid_coord, base_block_size, model_size_x, mo
     根据网格坐标和模型尺寸计算世界坐标
     """
     x, y, z = grid_coord
-    
+    place = get_placement_fn(base_block_size, model_size_x, model_size_y, model_size_z,
+                             adjacent_mode, use_model_center)
+    return place(x, y, z)
+
+def get_world_coordinates_batch(grid_coords, base_block_size, model_size_x, model_size_y, model_size_z,
+                                use_model_center=False, adjacent_mode=True):
+    """批量换算网格坐标，grid_coords为 (N,3) 数组，返回 (N,3) 的float64世界坐标（与逐个换算结果一致）"""
     if adjacent_mode:
-        # 相邻模式：根据模型实际尺寸计算位置
-        world_x = x * model_size_x
-        world_y = y * model_size_y
-        world_z = z * model_size_z  # 修复：Z轴也应该使用模型尺寸
-    else:
-        # 非相邻模式：使用基础网格大小
-        world_x = x * base_block_size
-        world_y = y * base_block_size
-        world_z = z * base_block_size
-    
-    # 处理定位模式
-    if not use_model_center:
-        # 模型底部对齐：将模型底部放在网格平面上
-        pass
+        steps = np.array((model_size_x, model_size_y, model_size_z), dtype=np.float64)
     else:
-        # 模型中心对齐：需要将模型中心放在计算的位置上
-        world_z += model_size_z / 2
+        steps = np.full(3, base_block_size, dtype=np.float64)
     
-    return world_x, world_y, world_z
+    world = np.asarray(grid_coords, dtype=np.float64).reshape(-1, 3) * steps
+    if use_model_center:
+        world[:, 2] += model_size_z / 2
+    return world
 
 def align_object_to_grid(obj, base_block_size, use_model_center=False):
     """将对象对齐到网格"""
-    # 计算当前对象的边界框尺寸
-    size_x, size_y, size_z, max_size = calculate_model_dimensions(obj)
-    
-    # 计算当前对象的中心
-    center = calculate_model_center(obj)
+    if obj.type == 'MESH':
+        # 一次计算边界框，尺寸、中心和底部都从中取
+        mn, mx = _bbox_world(obj)
+        size_z = float(mx[2] - mn[2])
+        center_x, center_y, center_z = ((mn + mx) / 2).tolist()
+        min_z = float(mn[2])
+    else:
+        size_z = 0.0
+        center_x = center_y = center_z = 0.0
+        min_z = float(_bbox_world(obj)[0][2])
     
-    # 计算最近的网格点
-    grid_x = round(center.x / base_block_size) * base_block_size
-    grid_y = round(center.y / base_block_size) * base_block_size
+    # 计算最近的网格点：乘倒数后floor(v+0.5)，恰在两格中间时统一向正方向取整
+    inv_bs = 1.0 / base_block_size
+    grid_x = math.floor(center_x * inv_bs + 0.5) * base_block_size
+    grid_y = math.floor(center_y * inv_bs + 0.5) * base_block_size
     
     if use_model_center:
-        grid_z = round(center.z / base_block_size) * base_block_size
+        grid_z = math.floor(center_z * inv_bs + 0.5) * base_block_size
     else:
         # 底部对齐
-        bbox_corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
-        z_coords = [corner.z for corner in bbox_corners]
-        min_z = min(z_coords)
-        grid_z = round(min_z / base_block_size) * base_block_size
+        grid_z = math.floor(min_z * inv_bs + 0.5) * base_block_size
     
     # 计算新的位置
     new_pos_x = grid_x
@@ -870,81 +1153,291 @@ def align_object_to_grid(obj, base_block_size, use_model_center=False):
     
     return current_pos, obj.location
 
+def align_objects_to_grid(objs, base_block_size, use_model_center=False):
+    """批量将对象对齐到网格：所有对象的角点一次性变换和归约，返回新位置 (N,3)"""
+    objs = list(objs)
+    if not objs:
+        return np.zeros((0, 3))
+    
+    matrices = np.array([obj.matrix_world for obj in objs], dtype=np.float64)   # (N,4,4)
+    corners = np.array([obj.bound_box for obj in objs], dtype=np.float64)       # (N,8,3)
+    world = np.einsum('nij,nkj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    mn = world.min(axis=1)
+    mx = world.max(axis=1)
+    
+    # 非网格对象按单个对齐的规则：中心和尺寸视为0
+    is_mesh = np.array([obj.type == 'MESH' for obj in objs])
+    centers = np.where(is_mesh[:, None], (mn + mx) / 2, 0.0)
+    size_z = np.where(is_mesh, mx[:, 2] - mn[:, 2], 0.0)
+    
+    # 与单个对齐相同的取整规则：floor(v * inv_bs + 0.5)
+    inv_bs = 1.0 / base_block_size
+    positions = np.empty((len(objs), 3))
+    positions[:, :2] = np.floor(centers[:, :2] * inv_bs + 0.5) * base_block_size
+    if use_model_center:
+        positions[:, 2] = np.floor(centers[:, 2] * inv_bs + 0.5) * base_block_size
+    else:
+        # 底部对齐
+        positions[:, 2] = np.floor(mn[:, 2] * inv_bs + 0.5) * base_block_size + size_z / 2
+    
+    for obj, position in zip(objs, positions.tolist()):
+        obj.location = position
+    
+    return positions
+
 # ============================================================================
 # 面检测函数
 # ============================================================================
 
+# 法线读取的复用缓冲区，按需倍增扩容
+_SCRATCH = {'normals': np.empty(0, dtype=np.float32)}
+
+def _get_face_normals(mesh):
+    """一次性读取所有面的法线，返回 (N,3) 数组（共享缓冲区视图，下次调用前有效）"""
+    count = len(mesh.polygons)
+    size = count * 3
+    buffer = _SCRATCH['normals']
+    if buffer.size < size:
+        buffer = _SCRATCH['normals'] = np.empty(max(size, buffer.size * 2), dtype=np.float32)
+    normals = buffer[:size]
+    mesh.polygons.foreach_get('normal', normals)
+    return normals.reshape(count, 3)
+
+# 方向锥判定阈值（平方形式）：|n_axis| > 0.7|n| 且另外两轴 |n_other| < 0.3|n|
+_AXIS_COS_SQ = 0.7 * 0.7
+_OFF_AXIS_SQ = 0.3 * 0.3
+
+if njit is not None:
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _classify_normals_kernel(normals, axis_cos_sq, off_axis_sq):
+        """单次遍历法线，把面索引写入6个方向桶，返回 (索引表, 各桶数量)"""
+        count = normals.shape[0]
+        buckets = np.empty((6, count), dtype=np.int32)
+        sizes = np.zeros(6, dtype=np.int64)
+        for i in range(count):
+            nx = normals[i, 0]
+            ny = normals[i, 1]
+            nz = normals[i, 2]
+            x2 = nx * nx
+            y2 = ny * ny
+            z2 = nz * nz
+            length_sq = x2 + y2 + z2
+            major = axis_cos_sq * length_sq
+            minor = off_axis_sq * length_sq
+            if x2 > major and y2 < minor and z2 < minor:
+                k = 0 if nx > 0 else 1
+            elif y2 > major and x2 < minor and z2 < minor:
+                k = 2 if ny > 0 else 3
+            elif z2 > major and x2 < minor and y2 < minor:
+                k = 4 if nz > 0 else 5
+            else:
+                continue
+            buckets[k, sizes[k]] = i
+            sizes[k] += 1
+        return buckets, sizes
+else:
+    _classify_normals_kernel = None
+
+# 空结果共享同一个只读数组，非网格/空网格对象不再逐次分配
+_EMPTY_FACES = np.empty(0, dtype=np.int32)
+_EMPTY_FACES.setflags(write=False)
+_EMPTY6 = (_EMPTY_FACES,) * 6
+_EMPTY_LABELS = np.empty(0, dtype=np.int8)
+_EMPTY_LABELS.setflags(write=False)
+
+def _face_indices(mask):
+    """布尔掩码转为连续的 int32 面索引数组"""
+    return np.flatnonzero(mask).astype(np.int32)
+
+# 方向面分类缓存：(网格指针, 网格名, 面数, 顶点数) -> [6个只读索引数组, 只读轴向标签]
+# 网格几何变化时由depsgraph处理函数失效（同一操作符内原地修改网格后需显式调用invalidate_face_cache），
+# 清除模板/重新生成时整体清空
+_FACE_CACHE = {}
+_FACE_CACHE_MAX = 256
+
+def invalidate_face_cache(mesh=None):
+    """清除方向面缓存；mesh为None时全部清除"""
+    if mesh is None:
+        _FACE_CACHE.clear()
+        return
+    pointer = mesh.as_pointer()
+    for key in [key for key in _FACE_CACHE if key[0] == pointer]:
+        del _FACE_CACHE[key]
+
+@bpy.app.handlers.persistent
+def _face_cache_depsgraph_update(scene, depsgraph):
+    """网格几何更新后让对应的方向面缓存失效"""
+    if not _FACE_CACHE:
+        return
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, bpy.types.Object):
+            data = data.data
+        if isinstance(data, bpy.types.Mesh):
+            invalidate_face_cache(data)
+
+def _face_cache_entry(mesh):
+    """取网格的方向面缓存项：[6个方向面索引数组, 轴向标签（首次使用时生成）]"""
+    key = (mesh.as_pointer(), mesh.name_full, len(mesh.polygons), len(mesh.vertices))
+    entry = _FACE_CACHE.get(key)
+    if entry is not None:
+        # 命中后移到末尾，淘汰时按最近最少使用
+        _FACE_CACHE[key] = _FACE_CACHE.pop(key)
+        return entry
+    
+    result = _classify_faces(mesh)
+    for faces in result:
+        faces.flags.writeable = False  # 缓存值共享，禁止调用方原地修改
+    
+    if len(_FACE_CACHE) >= _FACE_CACHE_MAX:
+        del _FACE_CACHE[next(iter(_FACE_CACHE))]
+    entry = _FACE_CACHE[key] = [result, None]
+    return entry
+
 def find_all_directional_faces(obj):
-    """查找所有方向面：X、-X、Y、-Y、Z、-Z"""
-    x_faces = []      # +X面
-    neg_x_faces = []  # -X面
-    y_faces = []      # +Y面
-    neg_y_faces = []  # -Y面
-    z_faces = []      # +Z面
-    neg_z_faces = []  # -Z面
-    
-    if obj.type != 'MESH':
-        return x_faces, neg_x_faces, y_faces, neg_y_faces, z_faces, neg_z_faces
-    
-    mesh = obj.data
-    
-    for poly in mesh.polygons:
-        normal = poly.normal
-        if normal.length > 0:
-            normal_normalized = normal.normalized()
-        else:
-            normal_normalized = normal
-        
-        # 检查+X面（法线≈(1,0,0)）
-        if normal_normalized.x > 0.7 and abs(normal_normalized.y) < 0.3 and abs(normal_normalized.z) < 0.3:
-            x_faces.append(poly.index)
-        # 检查-X面（法线≈(-1,0,0)）
-        elif normal_normalized.x < -0.7 and abs(normal_normalized.y) < 0.3 and abs(normal_normalized.z) < 0.3:
-            neg_x_faces.append(poly.index)
-        # 检查+Y面（法线≈(0,1,0)）
-        elif normal_normalized.y > 0.7 and abs(normal_normalized.x) < 0.3 and abs(normal_normalized.z) < 0.3:
-            y_faces.append(poly.index)
-        # 检查-Y面（法线≈(0,-1,0)）
-        elif normal_normalized.y < -0.7 and abs(normal_normalized.x) < 0.3 and abs(normal_normalized.z) < 0.3:
-            neg_y_faces.append(poly.index)
-        # 检查+Z面（法线≈(0,0,1)）
-        elif normal_normalized.z > 0.7 and abs(normal_normalized.x) < 0.3 and abs(normal_normalized.y) < 0.3:
-            z_faces.append(poly.index)
-        # 检查-Z面（法线≈(0,0,-1)）
-        elif normal_normalized.z < -0.7 and abs(normal_normalized.x) < 0.3 and abs(normal_normalized.y) < 0.3:
-            neg_z_faces.append(poly.index)
+    """查找所有方向面：X、-X、Y、-Y、Z、-Z（各返回 int32 面索引数组）"""
+    if obj.type != 'MESH' or not obj.data.polygons:
+        return _EMPTY6
+    return _face_cache_entry(obj.data)[0]
+
+def find_face_axis_labels(obj):
+    """每个面的轴向标签（int8：X/Y/Z/非定向），可直接作为查找表下标"""
+    if obj.type != 'MESH' or not obj.data.polygons:
+        return _EMPTY_LABELS
+    
+    entry = _face_cache_entry(obj.data)
+    if entry[1] is None:
+        labels = _face_axis_labels(len(obj.data.polygons), entry[0])
+        labels.flags.writeable = False
+        entry[1] = labels
+    return entry[1]
+
+def _classify_faces(mesh):
+    """按法线把网格的面分到6个方向"""
+    global _classify_normals_kernel
+    if _classify_normals_kernel is not None:
+        try:
+            buckets, sizes = _classify_normals_kernel(_get_face_normals(mesh), _AXIS_COS_SQ, _OFF_AXIS_SQ)
+            # 复制出各桶，释放 6N 大小的临时缓冲
+            return tuple(buckets[k, :sizes[k]].copy() for k in range(6))
+        except Exception as e:
+            # JIT编译或缓存加载失败时改用NumPy路径，不再重试
+            log.warning("numba面分类内核不可用，改用NumPy: %s", e)
+            _classify_normals_kernel = None
+    
+    # 与平方长度比较，省去归一化的开方和除法
+    normals = _get_face_normals(mesh)
+    nsq = normals * normals
+    length_sq = np.einsum('ij,ij->i', normals, normals)
+    major = nsq > (_AXIS_COS_SQ * length_sq)[:, None]
+    minor = nsq < (_OFF_AXIS_SQ * length_sq)[:, None]
+    positive = normals > 0
+    
+    along_x = major[:, 0] & minor[:, 1] & minor[:, 2]
+    along_y = major[:, 1] & minor[:, 0] & minor[:, 2]
+    along_z = major[:, 2] & minor[:, 0] & minor[:, 1]
+    
+    x_faces = _face_indices(along_x & positive[:, 0])        # +X面（法线≈(1,0,0)）
+    neg_x_faces = _face_indices(along_x & ~positive[:, 0])   # -X面（法线≈(-1,0,0)）
+    y_faces = _face_indices(along_y & positive[:, 1])        # +Y面（法线≈(0,1,0)）
+    neg_y_faces = _face_indices(along_y & ~positive[:, 1])   # -Y面（法线≈(0,-1,0)）
+    z_faces = _face_indices(along_z & positive[:, 2])        # +Z面（法线≈(0,0,1)）
+    neg_z_faces = _face_indices(along_z & ~positive[:, 2])   # -Z面（法线≈(0,0,-1)）
     
     return x_faces, neg_x_faces, y_faces, neg_y_faces, z_faces, neg_z_faces
 
+# 面轴向标签：按面索引标记所属轴，代替逐面在各方向索引表里查找
+_AXIS_X, _AXIS_Y, _AXIS_Z, _AXIS_NONE = 0, 1, 2, 3
+
+def _face_axis_labels(polygon_count, faces):
+    """把六个方向面索引表合成为长度为面数的 int8 轴向标签数组"""
+    x_faces, neg_x_faces, y_faces, neg_y_faces, z_faces, neg_z_faces = faces
+    labels = np.full(polygon_count, _AXIS_NONE, dtype=np.int8)
+    labels[z_faces] = _AXIS_Z
+    labels[neg_z_faces] = _AXIS_Z
+    labels[y_faces] = _AXIS_Y
+    labels[neg_y_faces] = _AXIS_Y
+    labels[x_faces] = _AXIS_X
+    labels[neg_x_faces] = _AXIS_X
+    return labels
+
 def find_x_faces_simple(obj):
-    """查找X面和-X面"""
-    x_faces = []      # +X面
-    neg_x_faces = []  # -X面
+    """查找X面和-X面（返回 int32 面索引数组）"""
+    # 与六方向分类共用同一次遍历和缓存
+    faces = find_all_directional_faces(obj)
+    return faces[0], faces[1]
+
+# ============================================================================
+# 材质相关函数
+# ============================================================================
+
+# 材质分配后待刷新的网格：批量分配完成后由 finalize_materials 统一 update 一次
+_PENDING_MESH_UPDATES = {}
+
+def _queue_mesh_update(obj):
+    """记录需要刷新的网格（同一网格只记一次）"""
+    _PENDING_MESH_UPDATES[obj.data.as_pointer()] = obj.data
+
+def finalize_materials(objects=None):
+    """批量刷新材质分配过的网格；objects为None时刷新所有待刷新的网格"""
+    if objects is not None:
+        meshes = {obj.data.as_pointer(): obj.data for obj in objects if obj.type == 'MESH'}
+        for pointer in meshes:
+            _PENDING_MESH_UPDATES.pop(pointer, None)
+    else:
+        meshes = dict(_PENDING_MESH_UPDATES)
+        _PENDING_MESH_UPDATES.clear()
     
-    if obj.type != 'MESH':
-        return x_faces, neg_x_faces
+    updated = 0
+    for mesh in meshes.values():
+        try:
+            mesh.update()
+            updated += 1
+        except ReferenceError:
+            pass  # 网格已被删除
+    return updated
+
+def _set_principled_defaults(bsdf_node, roughness=0.5):
+    """Principled BSDF的公共默认值：无高光、无金属度、无次表面散射"""
+    bsdf_node.inputs['Roughness'].default_value = roughness
+    # 兼容Blender 4.0：Specular和次表面散射输入名按版本确定
+    bsdf_node.inputs[_BSDF_SPECULAR_KEY].default_value = 0.0
+    bsdf_node.inputs['Metallic'].default_value = 0.0
+    bsdf_node.inputs[_BSDF_SUBSURFACE_KEY].default_value = 0.0
+
+def _build_bsdf_output(material, roughness=0.5):
+    """清空材质节点并建立 Principled BSDF -> 材质输出，返回 (nodes, links, bsdf_node, output_node)"""
+    # 确保使用节点
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
     
-    mesh = obj.data
+    # 新建材质自带 Principled BSDF -> 材质输出，直接复用，不再清空后重建
+    bsdf_node = output_node = None
+    if len(nodes) == 2:
+        bsdf_node = next((node for node in nodes if node.type == 'BSDF_PRINCIPLED'), None)
+        output_node = next((node for node in nodes if node.type == 'OUTPUT_MATERIAL'), None)
     
-    for poly in mesh.polygons:
-        normal = poly.normal
-        if normal.length > 0:
-            normal_normalized = normal.normalized()
-        else:
-            normal_normalized = normal
+    if bsdf_node is None or output_node is None:
+        # 清除所有现有节点
+        nodes.clear()
+        
+        # 创建输出节点
+        output_node = nodes.new(type='ShaderNodeOutputMaterial')
         
-        # 检查+X面（法线≈(1,0,0)）
-        if normal_normalized.x > 0.7 and abs(normal_normalized.y) < 0.3 and abs(normal_normalized.z) < 0.3:
-            x_faces.append(poly.index)
-        # 检查-X面（法线≈(-1,0,0)）
-        elif normal_normalized.x < -0.7 and abs(normal_normalized.y) < 0.3 and abs(normal_normalized.z) < 0.3:
-            neg_x_faces.append(poly.index)
+        # 创建Principled BSDF节点
+        bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
     
-    return x_faces, neg_x_faces
-
-# ============================================================================
-# 材质相关函数
-# ============================================================================
+    output_node.location = (300, 0)
+    bsdf_node.location = (0, 0)
+    _set_principled_defaults(bsdf_node, roughness)
+    
+    # 连接BSDF到输出（Surface输入只保留一条连接，复用时不会重复）
+    links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
+    
+    return nodes, links, bsdf_node, output_node
 
 def create_green_material():
     """创建或获取绿色共享材质（用于源模型检查）- 全局共享"""
@@ -952,67 +1445,29 @@ def create_green_material():
     green_color = (0.0, 1.0, 0.0, 1.0)  # 纯绿色 RGBA
     
     # 检查是否已存在该材质
-    if green_material_name in bpy.data.materials:
-        mat = bpy.data.materials[green_material_name]
+    mat = bpy.data.materials.get(green_material_name)
+    if mat is not None:
         return mat
     else:
         # 创建新材质
         mat = bpy.data.materials.new(name=green_material_name)
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        nodes.clear()
-        
-        # 创建Principled BSDF节点
-        principled = nodes.new(type='ShaderNodeBsdfPrincipled')
-        principled.location = (0, 0)
+        principled = _build_bsdf_output(mat)[2]
         principled.inputs['Base Color'].default_value = green_color
-        principled.inputs['Roughness'].default_value = 0.5
-        
-        # 兼容Blender 4.0
-        try:
-            if 'Specular' in principled.inputs:
-                principled.inputs['Specular'].default_value = 0.0
-            elif 'Specular IOR Level' in principled.inputs:
-                principled.inputs['Specular IOR Level'].default_value = 0.0
-        except:
-            pass
-        
-        try:
-            if 'Metallic' in principled.inputs:
-                principled.inputs['Metallic'].default_value = 0.0
-        except:
-            pass
-        
-        # 兼容Blender 4.0：尝试设置次表面散射输入
-        try:
-            if 'Subsurface' in principled.inputs:
-                principled.inputs['Subsurface'].default_value = 0.0
-            elif 'Subsurface Weight' in principled.inputs:
-                principled.inputs['Subsurface Weight'].default_value = 0.0
-        except:
-            pass
-        
-        output = nodes.new(type='ShaderNodeOutputMaterial')
-        output.location = (400, 0)
-        
-        # 连接节点
-        links = mat.node_tree.links
-        links.new(principled.outputs['BSDF'], output.inputs['Surface'])
         
         return mat
 
 def apply_green_material_to_x_faces(obj):
     """为X面和-X面应用绿色材质（仅用于源模型检查）"""
     if obj.type != 'MESH':
-        print(f"错误: 对象 {obj.name} 不是网格类型")
+        log.warning("错误: 对象 %s 不是网格类型", obj.name)
         return 0
     
     # 获取X面和-X面
     x_faces, neg_x_faces = find_x_faces_simple(obj)
-    all_x_faces = x_faces + neg_x_faces
+    all_x_faces = np.concatenate((x_faces, neg_x_faces))
     
-    if not all_x_faces:
-        print(f"对象 {obj.name} 没有找到X面或-X面")
+    if not all_x_faces.size:
+        log.debug("对象 %s 没有找到X面或-X面", obj.name)
         return 0
     
     # 创建或获取绿色材质（全局共享）
@@ -1030,89 +1485,108 @@ def apply_green_material_to_x_faces(obj):
         obj.data.materials.append(green_material)
         material_index = len(obj.data.materials) - 1
     
-    # 应用材质到X面和-X面
-    applied_count = 0
-    for face_idx in all_x_faces:
-        if face_idx < len(obj.data.polygons):
-            poly = obj.data.polygons[face_idx]
-            poly.material_index = material_index
-            applied_count += 1
+    # 应用材质到X面和-X面：读出现有索引，按面索引散射写入后一次写回
+    polygons = obj.data.polygons
+    indices = np.empty(len(polygons), dtype=np.int32)
+    polygons.foreach_get('material_index', indices)
+    indices[all_x_faces] = material_index
+    polygons.foreach_set('material_index', indices)
+    applied_count = int(all_x_faces.size)
     
-    obj.data.update()
+    _queue_mesh_update(obj)
     
     return applied_count
 
+# 单次导入内的文件存在性缓存：路径 -> bool，每次完整生成开始时清空
+_EXISTS_CACHE = {}
+
+def _exists(path):
+    """带缓存的os.path.exists，同一路径每次导入只访问一次文件系统"""
+    result = _EXISTS_CACHE.get(path)
+    if result is None:
+        result = _EXISTS_CACHE[path] = os.path.exists(path)
+    return result
+
+def clear_exists_cache():
+    """清空文件存在性缓存"""
+    _EXISTS_CACHE.clear()
+
+def _texture_key(texture_path):
+    """贴图路径的规范化键（绝对路径，大小写按系统规则）"""
+    return os.path.normcase(os.path.abspath(texture_path)) if texture_path else None
+
 def load_texture_image(texture_path):
-    """加载贴图图片"""
-    if not texture_path or not os.path.exists(texture_path):
-        print(f"贴图文件不存在: {texture_path}")
+    """加载贴图图片（按绝对路径缓存）"""
+    if not texture_path:
+        log.warning("贴图文件不存在: %s", texture_path)
+        return None
+    
+    # 先查管理器的贴图缓存，命中时不再访问文件系统
+    loaded_textures = _BLOCK_MANAGER._loaded_textures
+    key = _texture_key(texture_path)
+    image = loaded_textures.get(key)
+    if image is not None:
+        try:
+            image.name  # 图像已被删除时抛出ReferenceError
+            return image
+        except ReferenceError:
+            del loaded_textures[key]
+    
+    if not _exists(texture_path):
+        log.warning("贴图文件不存在: %s", texture_path)
         return None
     
     try:
-        # 获取文件名
-        tex_name = os.path.basename(texture_path)
-        
-        # 检查是否已存在同名图像
-        if tex_name in bpy.data.images:
-            image = bpy.data.images[tex_name]
-        else:
-            # 加载新图像
-            image = bpy.data.images.load(texture_path)
-        
+        # 按文件路径复用已加载的图像，不同文件夹下的同名贴图互不混用
+        image = bpy.data.images.load(texture_path, check_existing=True)
+        loaded_textures[key] = image
         return image
         
     except Exception as e:
-        print(f"✗ 加载贴图失败 {texture_path}: {e}")
+        log.warning("✗ 加载贴图失败 %s: %s", texture_path, e)
         return None
 
-def create_face_material_node_tree(material, position_id, texture_path, face_type='x', is_x_face=True, is_submodel=False):
-    """创建包含图像纹理的材质节点树（针对特定面类型）- 修复Z面和-Z面的UV映射"""
-    # 确保使用节点
-    material.use_nodes = True
-    
-    # 获取材质节点树
-    nodes = material.node_tree.nodes
-    links = material.node_tree.links
-    
-    # 清除所有现有节点
-    nodes.clear()
-    
-    # 创建输出节点
-    output_node = nodes.new(type='ShaderNodeOutputMaterial')
-    output_node.location = (300, 0)
-    
-    # 创建Principled BSDF节点
-    bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf_node.location = (0, 0)
-    bsdf_node.inputs['Roughness'].default_value = 0.5
-    
-    # 兼容Blender 4.0：尝试设置Specular输入（如果存在）
-    try:
-        if 'Specular' in bsdf_node.inputs:
-            bsdf_node.inputs['Specular'].default_value = 0.0
-        elif 'Specular IOR Level' in bsdf_node.inputs:
-            bsdf_node.inputs['Specular IOR Level'].default_value = 0.0
-    except:
-        pass
-    
-    # 兼容Blender 4.0：尝试设置Metallic输入（如果存在）
+_PREWARM_CHUNK_BYTES = 1 << 20
+
+def _read_file_into_page_cache(path):
+    """读一遍文件内容（丢弃数据），让系统文件缓存预热"""
     try:
-        if 'Metallic' in bsdf_node.inputs:
-            bsdf_node.inputs['Metallic'].default_value = 0.0
-    except:
-        pass
+        with open(path, 'rb') as f:
+            while f.read(_PREWARM_CHUNK_BYTES):
+                pass
+        return True
+    except OSError:
+        return False
+
+def prewarm_textures(paths, max_workers=8):
+    """多线程预读贴图文件，之后在主线程按顺序加载时直接命中系统文件缓存"""
+    # bpy.data.images.load 不是线程安全的，线程里只做纯文件读取，不创建任何图像数据块
+    loaded_textures = _BLOCK_MANAGER._loaded_textures
+    pending = sorted({path for path in paths
+                      if path and _texture_key(path) not in loaded_textures})
+    if not pending:
+        return 0
     
-    # 兼容Blender 4.0：尝试设置次表面散射输入
-    try:
-        if 'Subsurface' in bsdf_node.inputs:
-            bsdf_node.inputs['Subsurface'].default_value = 0.0
-        elif 'Subsurface Weight' in bsdf_node.inputs:
-            bsdf_node.inputs['Subsurface Weight'].default_value = 0.0
-    except:
-        pass
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        warmed = sum(executor.map(_read_file_into_page_cache, pending))
+    log.debug("预读贴图文件: %s/%s 个", warmed, len(pending))
+    return warmed
+
+# 没有贴图时的面材质纯色
+_FACE_FALLBACK_COLORS = {
+    'x': (1.0, 0.0, 0.0, 1.0),  # 红色
+    'y': (0.0, 1.0, 0.0, 1.0),  # 绿色
+    'z': (0.0, 0.0, 1.0, 1.0),  # 蓝色
+}
+_OTHER_FALLBACK_COLOR = (0.8, 0.8, 0.8, 1.0)     # 灰色
+_SUBMODEL_FALLBACK_COLOR = (0.5, 0.5, 0.8, 1.0)  # 子模型蓝色
+
+def create_face_material_node_tree(material, position_id, texture_path, face_type='x', is_x_face=True, is_submodel=False):
+    """创建包含图像纹理的材质节点树（针对特定面类型）- 修复Z面和-Z面的UV映射"""
+    face_key = face_type.lower()
     
-    # 连接BSDF到输出
-    links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
+    # 输出节点 + Principled BSDF
+    nodes, links, bsdf_node, output_node = _build_bsdf_output(material)
     
     # 如果有贴图，创建图像纹理节点
     if texture_path:
@@ -1122,6 +1596,7 @@ def create_face_material_node_tree(material, position_id, texture_path, face_typ
         if texture_image:
             # 创建图像纹理节点
             texture_node = nodes.new(type='ShaderNodeTexImage')
+            texture_node.name = 'texture'  # 模板复制后按名称换贴图
             texture_node.location = (-300, 0)
             texture_node.image = texture_image
             
@@ -1135,7 +1610,7 @@ def create_face_material_node_tree(material, position_id, texture_path, face_typ
             mapping.vector_type = 'TEXTURE'
             
             # Z面和-Z面的特殊处理：镜像X轴并向左旋转90度
-            if face_type.lower() == 'z':
+            if face_key == 'z':
                 # 镜像X轴
                 mapping.inputs['Scale'].default_value = (-1.0, 1.0, 1.0)
                 # 向左旋转90度（绕Z轴旋转-90度）
@@ -1147,81 +1622,18 @@ def create_face_material_node_tree(material, position_id, texture_path, face_typ
             links.new(texture_node.outputs['Color'], bsdf_node.inputs['Base Color'])
             
             return True
-        else:
-            # 如果贴图加载失败，使用纯色
-            if is_submodel:
-                bsdf_node.inputs['Base Color'].default_value = (0.5, 0.5, 0.8, 1.0)  # 子模型蓝色
-            elif face_type.lower() == 'x':
-                bsdf_node.inputs['Base Color'].default_value = (1.0, 0.0, 0.0, 1.0)  # 红色
-            elif face_type.lower() == 'y':
-                bsdf_node.inputs['Base Color'].default_value = (0.0, 1.0, 0.0, 1.0)  # 绿色
-            elif face_type.lower() == 'z':
-                bsdf_node.inputs['Base Color'].default_value = (0.0, 0.0, 1.0, 1.0)  # 蓝色
-            else:
-                bsdf_node.inputs['Base Color'].default_value = (0.8, 0.8, 0.8, 1.0)  # 灰色
-            return False
+    
+    # 没有贴图或贴图加载失败时使用纯色
+    if is_submodel:
+        bsdf_node.inputs['Base Color'].default_value = _SUBMODEL_FALLBACK_COLOR
     else:
-        # 如果没有贴图，使用纯色
-        if is_submodel:
-            bsdf_node.inputs['Base Color'].default_value = (0.5, 0.5, 0.8, 1.0)  # 子模型蓝色
-        elif face_type.lower() == 'x':
-            bsdf_node.inputs['Base Color'].default_value = (1.0, 0.0, 0.0, 1.0)  # 红色
-        elif face_type.lower() == 'y':
-            bsdf_node.inputs['Base Color'].default_value = (0.0, 1.0, 0.0, 1.0)  # 绿色
-        elif face_type.lower() == 'z':
-            bsdf_node.inputs['Base Color'].default_value = (0.0, 0.0, 1.0, 1.0)  # 蓝色
-        else:
-            bsdf_node.inputs['Base Color'].default_value = (0.8, 0.8, 0.8, 1.0)  # 灰色
-        return False
+        bsdf_node.inputs['Base Color'].default_value = _FACE_FALLBACK_COLORS.get(face_key, _OTHER_FALLBACK_COLOR)
+    return False
 
 def create_teamspawn_material_node_tree(material, texture_path):
     """为teamspawn类型创建材质节点树 - 只使用一个材质球，贴图处理模型和正常数组相反"""
-    # 确保使用节点
-    material.use_nodes = True
-    
-    # 获取材质节点树
-    nodes = material.node_tree.nodes
-    links = material.node_tree.links
-    
-    # 清除所有现有节点
-    nodes.clear()
-    
-    # 创建输出节点
-    output_node = nodes.new(type='ShaderNodeOutputMaterial')
-    output_node.location = (300, 0)
-    
-    # 创建Principled BSDF节点
-    bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf_node.location = (0, 0)
-    bsdf_node.inputs['Roughness'].default_value = 0.5
-    
-    # 兼容Blender 4.0：尝试设置Specular输入（如果存在）
-    try:
-        if 'Specular' in bsdf_node.inputs:
-            bsdf_node.inputs['Specular'].default_value = 0.0
-        elif 'Specular IOR Level' in bsdf_node.inputs:
-            bsdf_node.inputs['Specular IOR Level'].default_value = 0.0
-    except:
-        pass
-    
-    # 兼容Blender 4.0：尝试设置Metallic输入（如果存在）
-    try:
-        if 'Metallic' in bsdf_node.inputs:
-            bsdf_node.inputs['Metallic'].default_value = 0.0
-    except:
-        pass
-    
-    # 兼容Blender 4.0：尝试设置次表面散射输入
-    try:
-        if 'Subsurface' in bsdf_node.inputs:
-            bsdf_node.inputs['Subsurface'].default_value = 0.0
-        elif 'Subsurface Weight' in bsdf_node.inputs:
-            bsdf_node.inputs['Subsurface Weight'].default_value = 0.0
-    except:
-        pass
-    
-    # 连接BSDF到输出
-    links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
+    # 输出节点 + Principled BSDF
+    nodes, links, bsdf_node, output_node = _build_bsdf_output(material)
     
     # 如果有贴图，创建图像纹理节点
     if texture_path:
@@ -1231,6 +1643,7 @@ def create_teamspawn_material_node_tree(material, texture_path):
         if texture_image:
             # 创建图像纹理节点
             texture_node = nodes.new(type='ShaderNodeTexImage')
+            texture_node.name = 'texture'  # 模板复制后按名称换贴图
             texture_node.location = (-300, 0)
             texture_node.image = texture_image
             
@@ -1304,6 +1717,7 @@ def create_submodel_material_node_tree(material, diffuse_texture_path=None, emis
         diffuse_image = load_texture_image(diffuse_texture_path)
         if diffuse_image:
             diffuse_tex = nodes.new(type='ShaderNodeTexImage')
+            diffuse_tex.name = 'diffuse_tex'
             diffuse_tex.location = diffuse_tex_location
             diffuse_tex.image = diffuse_image
             
@@ -1327,6 +1741,7 @@ def create_submodel_material_node_tree(material, diffuse_texture_path=None, emis
         emission_image = load_texture_image(emission_texture_path)
         if emission_image:
             emission_tex = nodes.new(type='ShaderNodeTexImage')
+            emission_tex.name = 'emission_tex'
             emission_tex.location = emission_tex_location
             emission_tex.image = emission_image
             
@@ -1348,39 +1763,21 @@ def create_submodel_material_node_tree(material, diffuse_texture_path=None, emis
     # 5. 创建Principled BSDF节点
     principled = nodes.new(type='ShaderNodeBsdfPrincipled')
     principled.location = principled_location
-    principled.inputs['Metallic'].default_value = 0.000
-    principled.inputs['Roughness'].default_value = 0.500
+    _set_principled_defaults(principled)
     principled.inputs['IOR'].default_value = 1.450
     principled.inputs['Alpha'].default_value = 1.000
     
-    # Blender 4.0兼容性：尝试设置次表面散射（Subsurface）输入
-    try:
-        if 'Subsurface' in principled.inputs:
-            principled.inputs['Subsurface'].default_value = 0.0
-        elif 'Subsurface Weight' in principled.inputs:  # Blender 4.0中的新名称
-            principled.inputs['Subsurface Weight'].default_value = 0.0
-    except:
-        pass  # 如果不存在，跳过
-    
-    # 兼容Blender 4.0：尝试设置Specular输入
-    try:
-        if 'Specular' in principled.inputs:
-            principled.inputs['Specular'].default_value = 0.0
-        elif 'Specular IOR Level' in principled.inputs:
-            principled.inputs['Specular IOR Level'].default_value = 0.0
-    except:
-        pass
-    
     # 连接漫反射贴图到Principled BSDF
     if has_diffuse:
         links.new(diffuse_tex.outputs['Color'], principled.inputs['Base Color'])
         links.new(diffuse_tex.outputs['Alpha'], principled.inputs['Alpha'])
     else:
         # 默认颜色
-        principled.inputs['Base Color'].default_value = (0.5, 0.5, 0.8, 1.0)
+        principled.inputs['Base Color'].default_value = _SUBMODEL_FALLBACK_COLOR
     
     # 6. 创建自发光节点
     emission = nodes.new(type='ShaderNodeEmission')
+    emission.name = 'emission'
     emission.location = emission_location
     emission.inputs['Strength'].default_value = emission_strength
     
@@ -1402,21 +1799,55 @@ def create_submodel_material_node_tree(material, diffuse_texture_path=None, emis
     # 8. 连接混合着色器到输出
     links.new(add_shader.outputs['Shader'], output_node.inputs['Surface'])
     
-    # 修复：确保所有节点都正确连接
-    # 检查是否有未连接的节点
-    for node in nodes:
-        if node.type == 'TEX_IMAGE':
-            if node.image:
-                print(f"  图像纹理节点: {node.image.name}")
-                # 确保图像已加载
-                if node.image.filepath and not node.image.has_data:
-                    try:
-                        node.image.reload()
-                    except:
-                        print(f"    警告: 无法重新加载图像 {node.image.name}")
+    # 列出贴图节点；图像在首次使用时才解码，这里不再逐个reload
+    if log.isEnabledFor(logging.DEBUG):
+        for node in nodes:
+            if node.type == 'TEX_IMAGE' and node.image:
+                log.debug("  图像纹理节点: %s", node.image.name)
     
     return has_diffuse, has_emission
 
+# 节点树模板：每种节点结构只用Python逐个建一次节点，之后用 material.copy() 在C层整体克隆，
+# 复制后只替换贴图等少量参数
+_NODE_TREE_TEMPLATES = {}
+
+def _material_from_template(material_name, variant, build):
+    """按节点结构变体复制模板材质；模板不存在时用 build(模板材质) 创建"""
+    template = _NODE_TREE_TEMPLATES.get(variant)
+    if template is not None:
+        try:
+            template.name
+        except ReferenceError:
+            template = None
+    
+    if template is None:
+        template = bpy.data.materials.new(name="BlockTreeTemplate_" + "_".join(map(str, variant)))
+        build(template)
+        # 模板不引用具体贴图，避免占住图像数据块
+        for node in template.node_tree.nodes:
+            if node.type == 'TEX_IMAGE':
+                node.image = None
+        _NODE_TREE_TEMPLATES[variant] = template
+    
+    material = template.copy()
+    material.name = material_name
+    return material
+
+def clear_node_tree_templates():
+    """删除节点树模板材质"""
+    for template in _NODE_TREE_TEMPLATES.values():
+        try:
+            bpy.data.materials.remove(template)
+        except ReferenceError:
+            pass
+    _NODE_TREE_TEMPLATES.clear()
+
+def _set_template_image(material, node_name, image):
+    """给模板复制出的材质设置贴图"""
+    node = material.node_tree.nodes.get(node_name)
+    if node is not None:
+        node.image = image
+
 def get_material_name_for_face(position_id, face_type='x'):
     """根据位置ID和面类型生成材质名称"""
     return f"BlockMat_{face_type.upper()}_{position_id}"
@@ -1440,52 +1871,45 @@ def get_teamspawn_material_name(position_id):
     """获取teamspawn类型材质名称（只使用一个材质球）"""
     return f"BlockMat_Teamspawn_{position_id}"
 
+def _material_signature(kind, texture_path, *flags):
+    """材质内容签名：节点树类型 + 贴图绝对路径 + 影响节点树的参数（不含位置ID）"""
+    return (kind, _texture_key(texture_path)) + flags
+
 def create_or_get_face_material(position_id, texture_path, face_type='x'):
     """创建或获取面材质（共享材质系统）- 修复名称重复问题"""
-    manager = BlockModelManager()
+    manager = _BLOCK_MANAGER
     
-    # 修复：生成唯一材质名称，避免重复
-    # 使用更简单的命名规则，避免Blender自动添加后缀
+    # 固定命名；同名材质已存在时直接复用，名称冲突交给Blender处理
     mat_name = f"BlockMat_{face_type.upper()}_{position_id}"
     
-    # 修复：清理已存在的重复材质
-    if mat_name in bpy.data.materials:
-        # 检查是否是我们需要的材质
-        existing_mat = bpy.data.materials[mat_name]
-        # 如果材质已经有用户，并且不是我们需要的（比如名称被Blender修改过）
-        # 则创建新的唯一名称
-        if existing_mat.users > 0 and existing_mat.name != mat_name:
-            # 找到真正唯一的名称
-            base_name = f"BlockMat_{face_type.upper()}_{position_id}"
-            counter = 1
-            while f"{base_name}.{str(counter).zfill(3)}" in bpy.data.materials:
-                counter += 1
-            mat_name = f"{base_name}.{str(counter).zfill(3)}"
-    
-    # 检查是否已存在材质（包括可能的重命名版本）
+    # 检查是否已存在材质（管理器缓存或Blender中的同名材质）
     existing_mat = manager.get_material(mat_name)
     if existing_mat:
         return existing_mat
     
-    # 检查Blender中是否已存在同名材质
-    if mat_name in bpy.data.materials:
-        material = bpy.data.materials[mat_name]
+    # 贴图和面类型相同的材质已由其他位置ID创建过，直接共用
+    is_x_face = (face_type.lower() == 'x')
+    signature = _material_signature('face', texture_path, face_type.lower(), is_x_face)
+    material = manager.get_material_by_signature(signature)
+    if material:
         manager.set_material(mat_name, material)
         return material
     
-    # 创建新材质
-    material = bpy.data.materials.new(name=mat_name)
-    
-    # 创建材质节点树
-    create_face_material_node_tree(material, position_id, texture_path, face_type, is_x_face=(face_type.lower() == 'x'))
+    # 按（面类型, 是否有贴图）复制节点树模板，只替换贴图
+    texture_image = load_texture_image(texture_path) if texture_path else None
+    material = _material_from_template(
+        mat_name, ('face', face_type.lower(), texture_image is not None),
+        lambda template: create_face_material_node_tree(template, position_id, texture_path, face_type, is_x_face=is_x_face))
+    _set_template_image(material, 'texture', texture_image)
     
     manager.set_material(mat_name, material)
+    manager.set_material_by_signature(signature, material)
     
     return material
 
 def create_or_get_teamspawn_material(position_id, texture_path):
     """创建或获取teamspawn类型材质（只使用一个材质球）"""
-    manager = BlockModelManager()
+    manager = _BLOCK_MANAGER
     
     # 生成材质名称
     mat_name = get_teamspawn_material_name(position_id)
@@ -1495,19 +1919,28 @@ def create_or_get_teamspawn_material(position_id, texture_path):
     if existing_mat:
         return existing_mat
     
-    # 创建新材质
-    material = bpy.data.materials.new(name=mat_name)
+    # 同一贴图的teamspawn材质共用
+    signature = _material_signature('teamspawn', texture_path)
+    material = manager.get_material_by_signature(signature)
+    if material:
+        manager.set_material(mat_name, material)
+        return material
     
-    # 创建teamspawn类型材质节点树
-    create_teamspawn_material_node_tree(material, texture_path)
+    # 复制teamspawn类型节点树模板
+    texture_image = load_texture_image(texture_path) if texture_path else None
+    material = _material_from_template(
+        mat_name, ('teamspawn', texture_image is not None),
+        lambda template: create_teamspawn_material_node_tree(template, texture_path))
+    _set_template_image(material, 'texture', texture_image)
     
     manager.set_material(mat_name, material)
+    manager.set_material_by_signature(signature, material)
     
     return material
 
 def create_or_get_unified_material(position_id, texture_path):
     """创建或获取统一材质（所有面使用同一个贴图）"""
-    manager = BlockModelManager()
+    manager = _BLOCK_MANAGER
     
     # 生成材质名称
     mat_name = get_unified_material_name(position_id)
@@ -1517,19 +1950,28 @@ def create_or_get_unified_material(position_id, texture_path):
     if existing_mat:
         return existing_mat
     
-    # 创建新材质
-    material = bpy.data.materials.new(name=mat_name)
+    # 节点树与同一贴图的X面材质相同，可以直接共用
+    signature = _material_signature('face', texture_path, 'x', True)
+    material = manager.get_material_by_signature(signature)
+    if material:
+        manager.set_material(mat_name, material)
+        return material
     
-    # 创建材质节点树，使用'x'作为默认面类型
-    create_face_material_node_tree(material, position_id, texture_path, 'x', is_x_face=True)
+    # 复制X面节点树模板，使用'x'作为默认面类型
+    texture_image = load_texture_image(texture_path) if texture_path else None
+    material = _material_from_template(
+        mat_name, ('face', 'x', texture_image is not None),
+        lambda template: create_face_material_node_tree(template, position_id, texture_path, 'x', is_x_face=True))
+    _set_template_image(material, 'texture', texture_image)
     
     manager.set_material(mat_name, material)
+    manager.set_material_by_signature(signature, material)
     
     return material
 
 def create_or_get_submodel_material(position_id, diffuse_texture_path=None, emission_texture_path=None, submodel_name=None, emission_strength=2.6):
     """创建或获取子模型材质（支持自发光贴图）"""
-    manager = BlockModelManager()
+    manager = _BLOCK_MANAGER
     
     # 检查是否缺少子模型名称
     if not submodel_name:
@@ -1541,7 +1983,7 @@ def create_or_get_submodel_material(position_id, diffuse_texture_path=None, emis
             submodel_name = f"submodel_{position_id}"
     
     # 确定是否有自发光贴图
-    has_emission = emission_texture_path is not None and os.path.exists(emission_texture_path) if emission_texture_path else False
+    has_emission = emission_texture_path is not None and _exists(emission_texture_path) if emission_texture_path else False
     
     # 生成材质名称
     mat_name = get_material_name_for_submodel(position_id, submodel_name, has_emission)
@@ -1551,37 +1993,47 @@ def create_or_get_submodel_material(position_id, diffuse_texture_path=None, emis
     if existing_mat:
         return existing_mat
     
-    # 创建新材质
-    material = bpy.data.materials.new(name=mat_name)
-    
-    # 创建材质节点树（支持自发光贴图）
-    has_diffuse, has_emission_actual = create_submodel_material_node_tree(
-        material, 
-        diffuse_texture_path, 
-        emission_texture_path,
-        emission_strength
-    )
+    # 漫反射/自发光贴图和强度都相同的子模型共用一个材质
+    signature = _material_signature('sub', diffuse_texture_path, _texture_key(emission_texture_path), emission_strength)
+    material = manager.get_material_by_signature(signature)
+    if material:
+        manager.set_material(mat_name, material)
+        return material
     
-    # 记录材质信息
+    # 按（有无漫反射贴图, 有无自发光贴图）复制节点树模板，再换贴图和自发光强度
+    diffuse_image = load_texture_image(diffuse_texture_path) if diffuse_texture_path else None
+    emission_image = load_texture_image(emission_texture_path) if emission_texture_path else None
+    has_diffuse = diffuse_image is not None
+    has_emission_actual = emission_image is not None
+    material = _material_from_template(
+        mat_name, ('sub', has_diffuse, has_emission_actual),
+        lambda template: create_submodel_material_node_tree(
+            template, diffuse_texture_path, emission_texture_path, emission_strength))
+    # 插值/平铺方式已在模板的贴图节点上设置好，复制后只需换图像
+    for node_name, image in (('diffuse_tex', diffuse_image), ('emission_tex', emission_image)):
+        if image is not None:
+            _set_template_image(material, node_name, image)
+    material.node_tree.nodes['emission'].inputs['Strength'].default_value = emission_strength
+    
+    # 记录材质信息（材质会被贴图相同的其他位置ID共用，不记录单个位置ID/子模型名称）
     material["is_submodel_material"] = True
-    material["position_id"] = position_id
-    material["submodel_name"] = submodel_name
     material["has_emission"] = has_emission_actual
     material["has_diffuse"] = has_diffuse
     
     manager.set_material(mat_name, material)
+    manager.set_material_by_signature(signature, material)
     
-    print(f"✓ 创建子模型材质: {mat_name}")
-    print(f"  漫反射贴图: {'有' if has_diffuse else '无'}")
-    print(f"  自发光贴图: {'有' if has_emission_actual else '无'}")
+    log.debug("✓ 创建子模型材质: %s", mat_name)
+    log.debug("  漫反射贴图: %s", '有' if has_diffuse else '无')
+    log.debug("  自发光贴图: %s", '有' if has_emission_actual else '无')
     if has_emission_actual:
-        print(f"  自发光强度: {emission_strength}")
+        log.debug("  自发光强度: %s", emission_strength)
     
     return material
 
 def create_or_get_default_material(position_id):
     """创建或获取默认材质（用于非定向面）"""
-    manager = BlockModelManager()
+    manager = _BLOCK_MANAGER
     
     # 生成材质名称
     mat_name = get_default_material_name(position_id)
@@ -1591,63 +2043,19 @@ def create_or_get_default_material(position_id):
     if existing_mat:
         return existing_mat
     
-    # 创建新材质
-    material = bpy.data.materials.new(name=mat_name)
-    material.use_nodes = True
-    
-    # 获取材质节点
-    nodes = material.node_tree.nodes
-    links = material.node_tree.links
-    
-    # 清除所有默认节点
-    for node in nodes:
-        nodes.remove(node)
-    
-    # 创建输出节点
-    output_node = nodes.new(type='ShaderNodeOutputMaterial')
-    output_node.location = (300, 0)
-    
-    # 创建Principled BSDF节点
-    bsdf_node = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf_node.location = (0, 0)
+    # 复制默认BSDF模板（首次调用时创建），只改颜色
+    material = _material_from_template(
+        mat_name, ('default',), lambda template: _build_bsdf_output(template, roughness=0.8))
+    bsdf_node = next(node for node in material.node_tree.nodes if node.type == 'BSDF_PRINCIPLED')
     
     # 基于位置ID生成颜色（绿色系，以便区分）
-    import random
-    random.seed(position_id + 2000)  # 加偏移确保与其他材质颜色不同
+    rng = random.Random(position_id + 2000)  # 加偏移确保与其他材质颜色不同；局部实例不影响全局随机数
     hue = 0.3  # 绿色系
-    saturation = random.random() * 0.3 + 0.3
-    value = random.random() * 0.3 + 0.4
+    saturation = rng.random() * 0.3 + 0.3
+    value = rng.random() * 0.3 + 0.4
     from colorsys import hsv_to_rgb
     r, g, b = hsv_to_rgb(hue, saturation, value)
     bsdf_node.inputs['Base Color'].default_value = (r, g, b, 1.0)
-    bsdf_node.inputs['Roughness'].default_value = 0.8
-    
-    # 兼容Blender 4.0
-    try:
-        if 'Specular' in bsdf_node.inputs:
-            bsdf_node.inputs['Specular'].default_value = 0.0
-        elif 'Specular IOR Level' in bsdf_node.inputs:
-            bsdf_node.inputs['Specular IOR Level'].default_value = 0.0
-    except:
-        pass
-    
-    try:
-        if 'Metallic' in bsdf_node.inputs:
-            bsdf_node.inputs['Metallic'].default_value = 0.0
-    except:
-        pass
-    
-    # 兼容Blender 4.0：尝试设置次表面散射输入
-    try:
-        if 'Subsurface' in bsdf_node.inputs:
-            bsdf_node.inputs['Subsurface'].default_value = 0.0
-        elif 'Subsurface Weight' in bsdf_node.inputs:
-            bsdf_node.inputs['Subsurface Weight'].default_value = 0.0
-    except:
-        pass
-    
-    # 连接BSDF到输出
-    links.new(bsdf_node.outputs['BSDF'], output_node.inputs['Surface'])
     
     manager.set_material(mat_name, material)
     
@@ -1655,16 +2063,14 @@ def create_or_get_default_material(position_id):
 
 def apply_main_model_materials(obj, position_id, texture_base_path, mapping_data):
     """为主模型应用材质 - 根据材质系统决定使用哪种材质系统"""
-    print(f"为主模型 {obj.name} 应用材质...")
-    
-    # 清空现有材质
-    if len(obj.data.materials) > 0:
-        obj.data.materials.clear()
+    log.debug("为主模型 %s 应用材质...", obj.name)
     
+    # 材质槽由各材质系统按目标列表设置，已经一致时不再清空重建
     # 获取模型配置
-    model_config = BlockModelManager().get_model_config(position_id)
+    model_config = _BLOCK_MANAGER.get_model_config(position_id)
     if not model_config:
-        print(f"错误: 找不到位置ID {position_id} 的模型配置")
+        log.warning("错误: 找不到位置ID %s 的模型配置", position_id)
+        set_material_slots(obj, [])
         return False
     
     # 根据材质系统选择材质系统
@@ -1679,20 +2085,39 @@ def apply_main_model_materials(obj, position_id, texture_base_path, mapping_data
         return apply_minestone_material_system(obj, position_id, model_config)
     elif model_config.material_system == 'submodel_only':
         # replicator/airwall/copier类型：只创建子模型，不需要主模型
-        print(f"Blocktype {model_config.blocktype} 不需要主模型材质")
+        log.debug("Blocktype %s 不需要主模型材质", model_config.blocktype)
+        set_material_slots(obj, [])
         return True
     else:
         # 默认：标准XYZ面贴图
         return apply_default_material_system(obj, position_id, model_config)
 
+def set_material_slots(obj, materials):
+    """把对象的材质槽设为目标列表；槽位已一致时不改动，返回是否重建"""
+    slots = obj.data.materials
+    if len(slots) == len(materials) and all(
+            current == target for current, target in zip(slots, materials)):
+        return False
+    
+    slots.clear()
+    for material in materials:
+        slots.append(material)
+    return True
+
+def set_all_material_indices(obj, index):
+    """所有面使用同一个材质索引（一次foreach_set写入）"""
+    polygons = obj.data.polygons
+    polygons.foreach_set('material_index', np.full(len(polygons), index, dtype=np.int32))
+
 def apply_teamspawn_material_system(obj, position_id, model_config):
     """应用teamspawn类型材质系统：只使用一个材质球，贴图处理模型和正常数组相反"""
-    print(f"应用teamspawn类型材质系统...")
+    log.debug("应用teamspawn类型材质系统...")
     
     # 获取贴图路径
     texture_path = model_config._get_teamspawn_texture_path()
     
-    print(f"teamspawn贴图: {os.path.basename(texture_path) if texture_path else '无'}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("teamspawn贴图: %s", os.path.basename(texture_path) if texture_path else '无')
     
     # 创建或获取teamspawn材质
     teamspawn_mat = None
@@ -1704,249 +2129,164 @@ def apply_teamspawn_material_system(obj, position_id, model_config):
     # 如果没有贴图，使用默认材质
     default_mat = create_or_get_default_material(position_id)
     
-    # 添加材质到对象
+    # 设置对象材质槽
     if teamspawn_mat:
-        obj.data.materials.append(teamspawn_mat)
-        print(f"✓ 已添加teamspawn材质: {teamspawn_mat.name}")
+        changed = set_material_slots(obj, [teamspawn_mat])
+        log.debug("✓ 已添加teamspawn材质: %s", teamspawn_mat.name)
     else:
-        obj.data.materials.append(default_mat)
-        print(f"⚠ 使用默认材质替代teamspawn材质")
+        changed = set_material_slots(obj, [default_mat])
+        log.warning("⚠ 使用默认材质替代teamspawn材质")
     
-    # 所有面使用同一个材质索引
-    for poly in obj.data.polygons:
-        poly.material_index = 0
+    # 所有面使用同一个材质索引；已经全是0时（新导入的网格）不再写入
+    polygons = obj.data.polygons
+    indices = np.empty(len(polygons), dtype=np.int32)
+    polygons.foreach_get('material_index', indices)
+    if indices.any():
+        indices.fill(0)
+        polygons.foreach_set('material_index', indices)
+        changed = True
     
-    obj.data.update()
+    if changed:
+        _queue_mesh_update(obj)
     
-    print(f"✓ 已应用teamspawn类型材质系统")
-    print(f"  所有面使用同一个材质球: {teamspawn_mat.name if teamspawn_mat else default_mat.name}")
-    print(f"  应用于 {len(obj.data.polygons)} 个面")
+    log.debug("✓ 已应用teamspawn类型材质系统")
+    log.debug("  所有面使用同一个材质球: %s", teamspawn_mat.name if teamspawn_mat else default_mat.name)
+    log.debug("  应用于 %s 个面", len(obj.data.polygons))
     
     return True
 
+def classify_and_assign(obj, position_id, labels, label_textures):
+    """按面标签分配材质：只创建并添加实际有面用到的材质，材质索引一次foreach_set写入"""
+    # labels为每个面的标签，label_textures[标签] = (贴图路径, 面类型)，贴图缺失的标签使用默认材质
+    counts = np.bincount(labels, minlength=len(label_textures)).tolist()
+    slot_lut = np.zeros(len(label_textures), dtype=np.int32)
+    slots = {}  # 材质指针 -> 槽位索引，共享材质只占一个槽位
+    slot_materials = []
+    
+    for label, (texture_path, face_type) in enumerate(label_textures):
+        if not counts[label]:
+            continue
+        if texture_path:
+            material = create_or_get_face_material(position_id, texture_path, face_type)
+        else:
+            material = create_or_get_default_material(position_id)
+        
+        pointer = material.as_pointer()
+        if pointer not in slots:
+            slots[pointer] = len(slot_materials)
+            slot_materials.append(material)
+        slot_lut[label] = slots[pointer]
+    
+    set_material_slots(obj, slot_materials)
+    obj.data.polygons.foreach_set('material_index', slot_lut[labels])
+    _queue_mesh_update(obj)
+    return counts
+
 def apply_soil_material_system(obj, position_id, model_config):
     """应用soil类型材质系统：Z面特殊，其他面使用主贴图"""
-    print(f"应用soil类型材质系统...")
+    log.debug("应用soil类型材质系统...")
     
     # 获取贴图路径
     main_texture_path = model_config.get_texture_path('x')  # 主贴图（用于X、-X、Y、-Y、-Z面）
     z_texture_path = model_config.get_texture_path('z')     # Z面特殊贴图
     
-    print(f"主贴图: {os.path.basename(main_texture_path) if main_texture_path else '无'}")
-    print(f"Z面贴图: {os.path.basename(z_texture_path) if z_texture_path else '无'}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("主贴图: %s", os.path.basename(main_texture_path) if main_texture_path else '无')
+        log.debug("Z面贴图: %s", os.path.basename(z_texture_path) if z_texture_path else '无')
     
     # 修复：如果没有Z面特殊贴图，使用主贴图作为Z面贴图
     if not z_texture_path and main_texture_path:
-        print(f"警告：未找到Z面特殊贴图，将使用主贴图作为Z面贴图")
+        log.warning("警告：未找到Z面特殊贴图，将使用主贴图作为Z面贴图")
         z_texture_path = main_texture_path
     
-    # 创建或获取材质
-    main_mat = None
-    z_mat = None
-    
-    if main_texture_path:
-        # 创建主材质（用于X、-X、Y、-Y、-Z面）
-        main_mat = create_or_get_face_material(position_id, main_texture_path, 'x')
-    
-    if z_texture_path:
-        # 创建Z面材质
-        z_mat = create_or_get_face_material(position_id, z_texture_path, 'z')
-    
-    # 如果没有贴图，使用默认材质
-    default_mat = create_or_get_default_material(position_id)
-    
-    # 添加材质到对象
-    material_indices = {}
-    if main_mat:
-        obj.data.materials.append(main_mat)
-        material_indices['main'] = 0
-    if z_mat:
-        obj.data.materials.append(z_mat)
-        material_indices['z'] = len(obj.data.materials) - 1
-    if not main_mat and not z_mat:
-        obj.data.materials.append(default_mat)
-        material_indices['default'] = 0
-    
-    # 找到所有方向面
-    x_faces, neg_x_faces, y_faces, neg_y_faces, z_faces, neg_z_faces = find_all_directional_faces(obj)
-    
     # 检查是否有面
-    if len(obj.data.polygons) == 0:
-        print(f"警告: 对象 {obj.name} 没有面")
+    polygon_count = len(obj.data.polygons)
+    if polygon_count == 0:
+        log.warning("警告: 对象 %s 没有面", obj.name)
         return False
     
-    # 应用材质索引
-    main_count = 0
-    z_count = 0
-    default_count = 0
-    
-    for poly in obj.data.polygons:
-        if poly.index in z_faces:  # +Z面使用Z面特殊材质
-            if 'z' in material_indices:
-                poly.material_index = material_indices['z']
-                z_count += 1
-            elif 'main' in material_indices:
-                poly.material_index = material_indices['main']
-                main_count += 1
-            else:
-                poly.material_index = material_indices['default']
-                default_count += 1
-        elif poly.index in neg_z_faces:  # -Z面使用主材质
-            if 'main' in material_indices:
-                poly.material_index = material_indices['main']
-                main_count += 1
-            else:
-                poly.material_index = material_indices['default']
-                default_count += 1
-        else:
-            # X、-X、Y、-Y面使用主材质
-            if 'main' in material_indices:
-                poly.material_index = material_indices['main']
-                main_count += 1
-            else:
-                poly.material_index = material_indices['default']
-                default_count += 1
-    
-    obj.data.update()
+    # 面标签：0 = X、-X、Y、-Y、-Z面（主材质），1 = +Z面（Z面特殊材质）
+    z_faces = find_all_directional_faces(obj)[4]
+    labels = np.zeros(polygon_count, dtype=np.int8)
+    labels[z_faces] = 1
     
-    print(f"✓ 已应用soil类型材质系统")
-    print(f"  主材质: 应用于 {main_count} 个面（X、-X、Y、-Y、-Z）")
-    print(f"  Z面材质: 应用于 {z_count} 个面（+Z）")
-    print(f"  默认材质: 应用于 {default_count} 个面")
+    counts = classify_and_assign(
+        obj, position_id, labels, [(main_texture_path, 'x'), (z_texture_path, 'z')])
+    
+    main_count = counts[0] if main_texture_path else 0
+    z_count = counts[1] if z_texture_path else 0
+    default_count = polygon_count - main_count - z_count
+    
+    log.debug("✓ 已应用soil类型材质系统")
+    log.debug("  主材质: 应用于 %s 个面（X、-X、Y、-Y、-Z）", main_count)
+    log.debug("  Z面材质: 应用于 %s 个面（+Z）", z_count)
+    log.debug("  默认材质: 应用于 %s 个面", default_count)
     
     return True
 
 def apply_minestone_material_system(obj, position_id, model_config):
     """应用minestone类型材质系统：X、Y、Z面独立调配，每个面使用自己的贴图"""
-    print(f"应用minestone类型材质系统...")
+    log.debug("应用minestone类型材质系统...")
     
     # 获取各面贴图路径 - minestone类型各面独立
     x_texture_path = model_config.get_texture_path('x')
     y_texture_path = model_config.get_texture_path('y')
     z_texture_path = model_config.get_texture_path('z')
     
-    print(f"X面贴图: {os.path.basename(x_texture_path) if x_texture_path else '无'}")
-    print(f"Y面贴图: {os.path.basename(y_texture_path) if y_texture_path else '无'}")
-    print(f"Z面贴图: {os.path.basename(z_texture_path) if z_texture_path else '无'}")
-    
-    # 如果没有贴图，使用默认材质
-    if not x_texture_path and not y_texture_path and not z_texture_path:
-        default_mat = create_or_get_default_material(position_id)
-        obj.data.materials.append(default_mat)
-        
-        # 所有面使用默认材质
-        for poly in obj.data.polygons:
-            poly.material_index = 0
-        
-        obj.data.update()
-        print(f"✓ 已为主模型应用默认材质: {default_mat.name}")
-        return True
-    
-    # 创建或获取共享材质 - 为X、Y、Z面分别创建独立的材质
-    x_mat = None
-    y_mat = None
-    z_mat = None
-    
-    if x_texture_path:
-        x_mat = create_or_get_face_material(position_id, x_texture_path, 'x')
-    if y_texture_path:
-        y_mat = create_or_get_face_material(position_id, y_texture_path, 'y')
-    if z_texture_path:
-        z_mat = create_or_get_face_material(position_id, z_texture_path, 'z')
-    
-    # 创建或获取默认材质
-    default_mat = create_or_get_default_material(position_id)
-    
-    # 添加材质到对象
-    material_indices = {}
-    if x_mat:
-        obj.data.materials.append(x_mat)
-        material_indices['x'] = len(obj.data.materials) - 1
-    if y_mat:
-        obj.data.materials.append(y_mat)
-        material_indices['y'] = len(obj.data.materials) - 1
-    if z_mat:
-        obj.data.materials.append(z_mat)
-        material_indices['z'] = len(obj.data.materials) - 1
-    if not x_mat and not y_mat and not z_mat:
-        obj.data.materials.append(default_mat)
-        material_indices['default'] = 0
-    
-    # 找到所有方向面
-    x_faces, neg_x_faces, y_faces, neg_y_faces, z_faces, neg_z_faces = find_all_directional_faces(obj)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("X面贴图: %s", os.path.basename(x_texture_path) if x_texture_path else '无')
+        log.debug("Y面贴图: %s", os.path.basename(y_texture_path) if y_texture_path else '无')
+        log.debug("Z面贴图: %s", os.path.basename(z_texture_path) if z_texture_path else '无')
     
     # 检查是否有面
-    if len(obj.data.polygons) == 0:
-        print(f"警告: 对象 {obj.name} 没有面")
+    polygon_count = len(obj.data.polygons)
+    if polygon_count == 0:
+        log.warning("警告: 对象 %s 没有面", obj.name)
         return False
     
-    # 应用材质索引
-    x_count = 0
-    y_count = 0
-    z_count = 0
-    default_count = 0
-    
-    for poly in obj.data.polygons:
-        if poly.index in x_faces or poly.index in neg_x_faces:
-            if 'x' in material_indices:
-                poly.material_index = material_indices['x']
-                x_count += 1
-            elif 'default' in material_indices:
-                poly.material_index = material_indices['default']
-                default_count += 1
-        elif poly.index in y_faces or poly.index in neg_y_faces:
-            if 'y' in material_indices:
-                poly.material_index = material_indices['y']
-                y_count += 1
-            elif 'default' in material_indices:
-                poly.material_index = material_indices['default']
-                default_count += 1
-        elif poly.index in z_faces or poly.index in neg_z_faces:
-            if 'z' in material_indices:
-                poly.material_index = material_indices['z']
-                z_count += 1
-            elif 'default' in material_indices:
-                poly.material_index = material_indices['default']
-                default_count += 1
-        else:
-            if 'default' in material_indices:
-                poly.material_index = material_indices['default']
-                default_count += 1
+    # 按轴向标签分配：X、Y、Z面各用自己的贴图，非定向面和缺贴图的面使用默认材质
+    labels = find_face_axis_labels(obj)
+    counts = classify_and_assign(
+        obj, position_id, labels,
+        [(x_texture_path, 'x'), (y_texture_path, 'y'), (z_texture_path, 'z'), (None, None)])
     
-    obj.data.update()
+    x_count = counts[_AXIS_X] if x_texture_path else 0
+    y_count = counts[_AXIS_Y] if y_texture_path else 0
+    z_count = counts[_AXIS_Z] if z_texture_path else 0
+    default_count = polygon_count - x_count - y_count - z_count
     
-    print(f"✓ 已应用minestone类型材质系统")
-    print(f"  X面材质: 应用于 {x_count} 个面（+X和-X）")
-    print(f"  Y面材质: 应用于 {y_count} 个面（+Y和-Y）")
-    print(f"  Z面材质: 应用于 {z_count} 个面（+Z和-Z，已应用正确的UV映射）")
-    print(f"  默认材质: 应用于 {default_count} 个非定向面")
+    log.debug("✓ 已应用minestone类型材质系统")
+    log.debug("  X面材质: 应用于 %s 个面（+X和-X）", x_count)
+    log.debug("  Y面材质: 应用于 %s 个面（+Y和-Y）", y_count)
+    log.debug("  Z面材质: 应用于 %s 个面（+Z和-Z，已应用正确的UV映射）", z_count)
+    log.debug("  默认材质: 应用于 %s 个非定向面", default_count)
     
     return True
 
 def apply_default_material_system(obj, position_id, model_config):
     """应用默认材质系统：标准XYZ面贴图"""
-    print(f"应用默认材质系统...")
+    log.debug("应用默认材质系统...")
     
     # 获取各面贴图路径
     x_texture_path = model_config.get_texture_path('x')
     y_texture_path = model_config.get_texture_path('y')
     z_texture_path = model_config.get_texture_path('z')
     
-    print(f"X面贴图: {os.path.basename(x_texture_path) if x_texture_path else '无'}")
-    print(f"Y面贴图: {os.path.basename(y_texture_path) if y_texture_path else '无'}")
-    print(f"Z面贴图: {os.path.basename(z_texture_path) if z_texture_path else '无'}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("X面贴图: %s", os.path.basename(x_texture_path) if x_texture_path else '无')
+        log.debug("Y面贴图: %s", os.path.basename(y_texture_path) if y_texture_path else '无')
+        log.debug("Z面贴图: %s", os.path.basename(z_texture_path) if z_texture_path else '无')
     
     # 如果没有贴图，使用默认材质
     if not x_texture_path and not y_texture_path and not z_texture_path:
         default_mat = create_or_get_default_material(position_id)
-        obj.data.materials.append(default_mat)
+        set_material_slots(obj, [default_mat])
         
         # 所有面使用默认材质
-        for poly in obj.data.polygons:
-            poly.material_index = 0
+        set_all_material_indices(obj, 0)
         
-        obj.data.update()
-        print(f"✓ 已为主模型应用默认材质: {default_mat.name}")
+        _queue_mesh_update(obj)
+        log.debug("✓ 已为主模型应用默认材质: %s", default_mat.name)
         return True
     
     # 创建或获取共享材质
@@ -1957,65 +2297,46 @@ def apply_default_material_system(obj, position_id, model_config):
     # 创建或获取默认材质
     default_mat = create_or_get_default_material(position_id)
     
-    # 添加材质到对象
-    obj.data.materials.append(x_mat)       # 索引0: X面材质
-    obj.data.materials.append(y_mat)       # 索引1: Y面材质
-    obj.data.materials.append(z_mat)       # 索引2: Z面材质
-    obj.data.materials.append(default_mat) # 索引3: 默认材质
-    
-    # 找到所有方向面
-    x_faces, neg_x_faces, y_faces, neg_y_faces, z_faces, neg_z_faces = find_all_directional_faces(obj)
+    # 设置对象材质槽
+    set_material_slots(obj, [
+        x_mat,        # 索引0: X面材质
+        y_mat,        # 索引1: Y面材质
+        z_mat,        # 索引2: Z面材质
+        default_mat,  # 索引3: 默认材质
+    ])
     
     # 检查是否有面
     if len(obj.data.polygons) == 0:
-        print(f"警告: 对象 {obj.name} 没有面")
+        log.warning("警告: 对象 %s 没有面", obj.name)
         return False
     
-    # 应用材质索引
-    x_count = 0
-    y_count = 0
-    z_count = 0
-    default_count = 0
-    
-    for poly in obj.data.polygons:
-        if poly.index in x_faces or poly.index in neg_x_faces:
-            poly.material_index = 0      # X面材质
-            x_count += 1
-        elif poly.index in y_faces or poly.index in neg_y_faces:
-            poly.material_index = 1      # Y面材质
-            y_count += 1
-        elif poly.index in z_faces or poly.index in neg_z_faces:
-            poly.material_index = 2      # Z面材质
-            z_count += 1
-        else:
-            poly.material_index = 3      # 默认材质
-            default_count += 1
+    # 轴向标签与材质槽位一一对应（X=0, Y=1, Z=2, 非定向=3），直接作为材质索引一次写入
+    axes = find_face_axis_labels(obj)
+    obj.data.polygons.foreach_set('material_index', axes.astype(np.int32))
+    x_count, y_count, z_count, default_count = np.bincount(axes, minlength=4).tolist()
     
-    obj.data.update()
+    _queue_mesh_update(obj)
     
-    print(f"✓ 已应用默认材质系统")
-    print(f"  X面材质（索引0）: 应用于 {x_count} 个面（+X和-X）")
-    print(f"  Y面材质（索引1）: 应用于 {y_count} 个面（+Y和-Y）")
-    print(f"  Z面材质（索引2）: 应用于 {z_count} 个面（+Z和-Z，已应用正确的UV映射）")
-    print(f"  默认材质（索引3）: 应用于 {default_count} 个非定向面")
+    log.debug("✓ 已应用默认材质系统")
+    log.debug("  X面材质（索引0）: 应用于 %s 个面（+X和-X）", x_count)
+    log.debug("  Y面材质（索引1）: 应用于 %s 个面（+Y和-Y）", y_count)
+    log.debug("  Z面材质（索引2）: 应用于 %s 个面（+Z和-Z，已应用正确的UV映射）", z_count)
+    log.debug("  默认材质（索引3）: 应用于 %s 个非定向面", default_count)
     
     return True
 
 def apply_submodel_materials(obj, position_id, texture_base_path, mapping_data):
     """为子模型应用材质（支持自发光贴图）"""
-    print(f"为子模型 {obj.name} 应用材质...")
-    
-    # 清空现有材质
-    if len(obj.data.materials) > 0:
-        obj.data.materials.clear()
+    log.debug("为子模型 %s 应用材质...", obj.name)
     
+    # 材质槽只在与目标材质不一致时重建，已经一致时面索引也无需重写
     # 获取子模型名称
     submodel_name = mapping_data.get('submodel_name', '') if mapping_data else ''
     
     # teamspawn类型没有子模型
     if submodel_name and mapping_data.get('blocktype') != 'teamspawn':
         # 查找子模型贴图
-        model_config = BlockModelManager().get_model_config(position_id)
+        model_config = _BLOCK_MANAGER.get_model_config(position_id)
         diffuse_texture_path = None
         emission_texture_path = None
         
@@ -2031,26 +2352,21 @@ def apply_submodel_materials(obj, position_id, texture_base_path, mapping_data):
             submodel_name,
             emission_strength=2.6
         )
-        obj.data.materials.append(submodel_mat)
-        
-        # 所有面使用子模型材质
-        for poly in obj.data.polygons:
-            poly.material_index = 0
-        
-        obj.data.update()
-        print(f"✓ 已为子模型应用材质: {submodel_mat.name}")
-        print(f"  漫反射贴图: {os.path.basename(diffuse_texture_path) if diffuse_texture_path else '无'}")
-        print(f"  自发光贴图: {os.path.basename(emission_texture_path) if emission_texture_path else '无'}")
+        if set_material_slots(obj, [submodel_mat]):
+            # 所有面使用子模型材质
+            set_all_material_indices(obj, 0)
+            _queue_mesh_update(obj)
+        log.debug("✓ 已为子模型应用材质: %s", submodel_mat.name)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("  漫反射贴图: %s", os.path.basename(diffuse_texture_path) if diffuse_texture_path else '无')
+            log.debug("  自发光贴图: %s", os.path.basename(emission_texture_path) if emission_texture_path else '无')
     else:
         # 使用默认材质
         default_mat = create_or_get_default_material(position_id)
-        obj.data.materials.append(default_mat)
-        
-        for poly in obj.data.polygons:
-            poly.material_index = 0
-        
-        obj.data.update()
-        print(f"✓ 已为子模型应用默认材质: {default_mat.name}")
+        if set_material_slots(obj, [default_mat]):
+            set_all_material_indices(obj, 0)
+            _queue_mesh_update(obj)
+        log.debug("✓ 已为子模型应用默认材质: %s", default_mat.name)
     
     return True
 
@@ -2058,9 +2374,24 @@ def apply_submodel_materials(obj, position_id, texture_base_path, mapping_data):
 # 核心功能函数 - 完全修复尺寸缩放问题，支持等比缩放
 # ============================================================================
 
-def load_and_setup_model(context, model_path, model_name, position_id, texture_base_path, mapping_data, is_main_model=True, uniform_scale_factor=None):
+# 一次批量生成中不变的设置快照，逐个模型/方块使用时不再经过RNA读取属性
+GeneratorConfig = namedtuple('GeneratorConfig',
+                             'scale_mode custom_scale_factor base_block_size adjacent_mode emission_strength')
+
+def read_generator_config(context):
+    """读取当前场景的生成设置快照"""
+    settings = context.scene.block_generator_settings
+    return GeneratorConfig(
+        settings.scale_mode,
+        settings.custom_scale_factor,
+        settings.base_block_size,
+        settings.adjacent_mode,
+        settings.emission_strength,
+    )
+
+def load_and_setup_model(context, model_path, model_name, position_id, texture_base_path, mapping_data, is_main_model=True, uniform_scale_factor=None, cfg=None):
     """加载并设置模型 - 修复：支持等比缩放，主模型和子模型使用相同的缩放因子"""
-    print(f"加载模型: {model_path}")
+    log.debug("加载模型: %s", model_path)
     
     # 保存当前状态
     current_mode = context.mode
@@ -2075,18 +2406,19 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
         bpy.ops.object.select_all(action='DESELECT')
         
         # 检查文件是否存在
-        if not os.path.exists(model_path):
-            print(f"✗ 模型文件不存在: {model_path}")
+        if not _exists(model_path):
+            log.warning("✗ 模型文件不存在: %s", model_path)
             return None
         
-        # 获取缩放设置
-        settings = context.scene.block_generator_settings
-        scale_mode = settings.scale_mode
-        custom_scale_factor = settings.custom_scale_factor
-        base_block_size = settings.base_block_size
+        # 获取缩放设置（批量生成时由调用方传入快照）
+        if cfg is None:
+            cfg = read_generator_config(context)
+        scale_mode = cfg.scale_mode
+        custom_scale_factor = cfg.custom_scale_factor
+        base_block_size = cfg.base_block_size
         
-        print(f"  缩放设置: 模式={scale_mode}, 自定义缩放={custom_scale_factor}, 基础网格={base_block_size}")
-        print(f"  是否为子模型: {not is_main_model}")
+        log.debug("  缩放设置: 模式=%s, 自定义缩放=%s, 基础网格=%s", scale_mode, custom_scale_factor, base_block_size)
+        log.debug("  是否为子模型: %s", not is_main_model)
         
         # 导入OBJ文件
         try:
@@ -2103,7 +2435,7 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
                     imported_objs.append(obj)
             
             if not imported_objs:
-                print(f"✗ 没有导入任何网格对象: {model_path}")
+                log.warning("✗ 没有导入任何网格对象: %s", model_path)
                 return None
             
             # 合并所有导入的对象（如果有多个）
@@ -2122,22 +2454,25 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
             if merged_obj.name not in context.collection.objects:
                 context.collection.objects.link(merged_obj)
             
-            # 选择对象
-            bpy.ops.object.select_all(action='DESELECT')
-            merged_obj.select_set(True)
-            context.view_layer.objects.active = merged_obj
-            
-            # 应用变换（这会移除缩放，但不应该改变顶点坐标）
-            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+            # 应用变换：直接把导入时的物体变换写入网格顶点，物体矩阵归零，
+            # 不经过选择和 transform_apply 操作符
+            mesh = merged_obj.data
+            mesh.transform(merged_obj.matrix_world)
+            merged_obj.matrix_world = Matrix.Identity(4)
             
-            # 移动到原点
-            merged_obj.location = (0, 0, 0)
-            
-            # 计算法线
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action='SELECT')
-            bpy.ops.mesh.normals_make_consistent(inside=False)
-            bpy.ops.object.mode_set(mode='OBJECT')
+            # 计算法线：在BMesh上统一面朝向（等同编辑模式下的“法线朝外”），不切换模式
+            bm = bmesh.new()
+            try:
+                bm.from_mesh(mesh)
+                bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+                bm.to_mesh(mesh)
+            finally:
+                bm.free()
+            mesh.update()
+            # 顶点和法线已原地改写而面数/顶点数不变；depsgraph处理函数要等操作符返回后才运行，
+            # 这里直接让方向面缓存失效，后面的材质分配不会取到旧的分类
+            invalidate_face_cache(mesh)
+            context.view_layer.update()  # 刷新物体包围盒，下面按新顶点计算尺寸
             
             # 计算原始尺寸（应用变换后的实际尺寸）
             size_x, size_y, size_z, max_size = calculate_model_dimensions(merged_obj)
@@ -2148,7 +2483,7 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
             # 如果提供了统一的缩放因子，就使用它（等比缩放）
             if uniform_scale_factor is not None:
                 scale_factor = uniform_scale_factor
-                print(f"  使用统一缩放因子: {scale_factor:.6f} (等比缩放)")
+                log.debug("  使用统一缩放因子: %.6f (等比缩放)", scale_factor)
             else:
                 # 否则根据自身尺寸和设置计算缩放因子
                 if scale_mode == 'ONE_METER':
@@ -2161,7 +2496,7 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
                     scale_factor = custom_scale_factor
                 else:  # 'ORIGINAL'
                     scale_factor = 1.0
-                print(f"  独立计算缩放因子: {scale_factor:.6f}")
+                log.debug("  独立计算缩放因子: %.6f", scale_factor)
             
             # 记录原始尺寸
             original_size_x = size_x
@@ -2171,12 +2506,16 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
             
             # 应用缩放（如果缩放因子不等于1.0）
             if abs(scale_factor - 1.0) > 0.0001:
-                print(f"  应用缩放因子: {scale_factor:.6f}")
-                merged_obj.scale = (scale_factor, scale_factor, scale_factor)
-                bpy.ops.object.transform_apply(scale=True)
+                log.debug("  应用缩放因子: %.6f", scale_factor)
+                merged_obj.data.transform(Matrix.Scale(scale_factor, 4))
+                merged_obj.data.update()
+                invalidate_face_cache(merged_obj.data)
                 
-                # 重新计算缩放后的尺寸
-                size_x, size_y, size_z, max_size = calculate_model_dimensions(merged_obj)
+                # 等比缩放后的尺寸直接按比例换算，不再重新测量
+                size_x *= scale_factor
+                size_y *= scale_factor
+                size_z *= scale_factor
+                max_size *= scale_factor
             
             # 存储尺寸信息
             merged_obj["block_size_x"] = size_x
@@ -2190,10 +2529,10 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
             merged_obj["original_size_z"] = original_size_z
             merged_obj["original_max_size"] = original_max_size
             
-            print(f"✓ 加载模型成功: {merged_obj.name}")
-            print(f"  原始尺寸: X={original_size_x:.6f}, Y={original_size_y:.6f}, Z={original_size_z:.6f}, 最大={original_max_size:.6f}")
-            print(f"  缩放后尺寸: X={size_x:.6f}, Y={size_y:.6f}, Z={size_z:.6f}, 最大={max_size:.6f}")
-            print(f"  缩放因子: {scale_factor:.6f}")
+            log.debug("✓ 加载模型成功: %s", merged_obj.name)
+            log.debug("  原始尺寸: X=%.6f, Y=%.6f, Z=%.6f, 最大=%.6f", original_size_x, original_size_y, original_size_z, original_max_size)
+            log.debug("  缩放后尺寸: X=%.6f, Y=%.6f, Z=%.6f, 最大=%.6f", size_x, size_y, size_z, max_size)
+            log.debug("  缩放因子: %.6f", scale_factor)
             
             # 应用材质
             if is_main_model:
@@ -2206,12 +2545,12 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
             return merged_obj
             
         except Exception as e:
-            print(f"✗ 导入模型失败: {e}")
+            log.warning("✗ 导入模型失败: %s", e)
             traceback.print_exc()
             return None
     
     except Exception as e:
-        print(f"✗ 加载并设置模型失败: {e}")
+        log.warning("✗ 加载并设置模型失败: %s", e)
         traceback.print_exc()
         return None
     
@@ -2231,31 +2570,30 @@ def load_and_setup_model(context, model_path, model_name, position_id, texture_b
         if current_mode != 'OBJECT':
             bpy.ops.object.mode_set(mode=current_mode)
 
-def create_template_for_position_id(context, position_id, texture_base_path, models_base_path):
+def create_template_for_position_id(context, position_id, texture_base_path, models_base_path, cfg=None):
     """为指定位置ID创建模板（支持主模型+子模型系统）- 修复：等比缩放"""
-    manager = BlockModelManager()
+    manager = _BLOCK_MANAGER
     
     # 检查是否已存在该位置ID的模板
     if manager.has_template_for_id(position_id):
         template = manager.get_template(position_id)
-        print(f"位置ID {position_id} 的模板已存在: {template.name}")
+        log.debug("位置ID %s 的模板已存在: %s", position_id, template.name)
         return template
     
     # 获取映射数据
     mapping_data = manager.get_mapping_for_id(position_id)
     
-    # 创建模型配置
-    model_config = ModelConfig(position_id, mapping_data, texture_base_path, models_base_path)
-    manager.set_model_config(position_id, model_config)
+    # 获取（或构建）模型配置
+    model_config = manager.get_or_build_config(position_id, texture_base_path, models_base_path)
     
-    print(f"\n为位置ID {position_id} 创建模板...")
-    print(f"Blocktype: {mapping_data.get('blocktype') if mapping_data else '无'}")
-    print(f"主贴图: {mapping_data.get('main_texture_prefix') if mapping_data else '无'}")
-    print(f"子模型: {mapping_data.get('submodel_name') if mapping_data else '无'}")
-    print(f"主模型路径: {model_config.main_model_path}")
-    print(f"子模型路径: {model_config.submodel_path}")
-    print(f"主模型: {'需要' if model_config.has_main_model() else '不需要'}")
-    print(f"子模型: {'需要' if model_config.has_submodel() else '不需要'}")
+    log.debug("为位置ID %s 创建模板...", position_id)
+    log.debug("Blocktype: %s", mapping_data.get('blocktype') if mapping_data else '无')
+    log.debug("主贴图: %s", mapping_data.get('main_texture_prefix') if mapping_data else '无')
+    log.debug("子模型: %s", mapping_data.get('submodel_name') if mapping_data else '无')
+    log.debug("主模型路径: %s", model_config.main_model_path)
+    log.debug("子模型路径: %s", model_config.submodel_path)
+    log.debug("主模型: %s", '需要' if model_config.has_main_model() else '不需要')
+    log.debug("子模型: %s", '需要' if model_config.has_submodel() else '不需要')
     
     # 保存当前状态
     current_mode = context.mode
@@ -2272,18 +2610,19 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
         # 清除所有选择
         bpy.ops.object.select_all(action='DESELECT')
         
-        # 获取缩放设置
-        settings = context.scene.block_generator_settings
-        scale_mode = settings.scale_mode
-        custom_scale_factor = settings.custom_scale_factor
-        base_block_size = settings.base_block_size
+        # 获取缩放设置（批量生成时由调用方传入快照）
+        if cfg is None:
+            cfg = read_generator_config(context)
+        scale_mode = cfg.scale_mode
+        custom_scale_factor = cfg.custom_scale_factor
+        base_block_size = cfg.base_block_size
         
         # 关键修复：计算统一的缩放因子，用于等比缩放
         uniform_scale_factor = None
         
         # 首先加载主模型计算缩放因子（如果存在）
         if model_config.has_main_model():
-            print(f"\n计算等比缩放因子（基于主模型）...")
+            log.debug("计算等比缩放因子（基于主模型）...")
             
             # 临时加载主模型以计算原始尺寸
             temp_model = None
@@ -2312,7 +2651,7 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                     # 计算原始尺寸
                     temp_size_x, temp_size_y, temp_size_z, temp_max_size = calculate_model_dimensions(temp_model)
                     
-                    print(f"  主模型原始尺寸: X={temp_size_x:.6f}, Y={temp_size_y:.6f}, Z={temp_size_z:.6f}, 最大={temp_max_size:.6f}")
+                    log.debug("  主模型原始尺寸: X=%.6f, Y=%.6f, Z=%.6f, 最大=%.6f", temp_size_x, temp_size_y, temp_size_z, temp_max_size)
                     
                     # 根据缩放模式计算统一的缩放因子
                     if scale_mode == 'ONE_METER':
@@ -2325,18 +2664,18 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                     else:  # 'ORIGINAL'
                         uniform_scale_factor = 1.0
                     
-                    print(f"  计算统一缩放因子: {uniform_scale_factor:.6f}")
+                    log.debug("  计算统一缩放因子: %.6f", uniform_scale_factor)
                     
                     # 删除临时模型
                     bpy.data.objects.remove(temp_model)
             except Exception as e:
-                print(f"  计算缩放因子时出错: {e}")
+                log.warning("  计算缩放因子时出错: %s", e)
                 if temp_model and temp_model.name in bpy.data.objects:
                     bpy.data.objects.remove(temp_model)
         
         # 如果没有主模型，但有子模型，使用子模型计算缩放因子
         elif model_config.has_submodel() and uniform_scale_factor is None:
-            print(f"\n计算等比缩放因子（基于子模型）...")
+            log.debug("计算等比缩放因子（基于子模型）...")
             
             # 临时加载子模型以计算原始尺寸
             temp_model = None
@@ -2365,7 +2704,7 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                     # 计算原始尺寸
                     temp_size_x, temp_size_y, temp_size_z, temp_max_size = calculate_model_dimensions(temp_model)
                     
-                    print(f"  子模型原始尺寸: X={temp_size_x:.6f}, Y={temp_size_y:.6f}, Z={temp_size_z:.6f}, 最大={temp_max_size:.6f}")
+                    log.debug("  子模型原始尺寸: X=%.6f, Y=%.6f, Z=%.6f, 最大=%.6f", temp_size_x, temp_size_y, temp_size_z, temp_max_size)
                     
                     # 根据缩放模式计算统一的缩放因子
                     if scale_mode == 'ONE_METER':
@@ -2378,12 +2717,12 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                     else:  # 'ORIGINAL'
                         uniform_scale_factor = 1.0
                     
-                    print(f"  计算统一缩放因子: {uniform_scale_factor:.6f}")
+                    log.debug("  计算统一缩放因子: %.6f", uniform_scale_factor)
                     
                     # 删除临时模型
                     bpy.data.objects.remove(temp_model)
             except Exception as e:
-                print(f"  计算缩放因子时出错: {e}")
+                log.warning("  计算缩放因子时出错: %s", e)
                 if temp_model and temp_model.name in bpy.data.objects:
                     bpy.data.objects.remove(temp_model)
         
@@ -2396,13 +2735,13 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                 uniform_scale_factor = custom_scale_factor
             else:  # 'ORIGINAL'
                 uniform_scale_factor = 1.0
-            print(f"  使用默认缩放因子: {uniform_scale_factor:.6f}")
+            log.debug("  使用默认缩放因子: %.6f", uniform_scale_factor)
         
-        print(f"\n等比缩放因子已确定: {uniform_scale_factor:.6f}")
+        log.debug("等比缩放因子已确定: %.6f", uniform_scale_factor)
         
         # 1. 创建主模型（如果需要）
         if model_config.has_main_model():
-            print(f"创建主模型...")
+            log.debug("创建主模型...")
             main_model = load_and_setup_model(
                 context,
                 model_config.main_model_path,
@@ -2411,20 +2750,21 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                 texture_base_path,
                 mapping_data,
                 is_main_model=True,
-                uniform_scale_factor=uniform_scale_factor  # 使用统一缩放因子
+                uniform_scale_factor=uniform_scale_factor,  # 使用统一缩放因子
+                cfg=cfg
             )
             if main_model:
                 # 隐藏主模型
                 main_model.hide_set(True)
                 main_model.hide_render = True
-                print(f"✓ 主模型创建成功: {main_model.name}")
+                log.debug("✓ 主模型创建成功: %s", main_model.name)
             else:
-                print(f"✗ 主模型创建失败")
+                log.warning("✗ 主模型创建失败")
         
         # 2. 创建子模型（如果需要）- 关键修复：使用相同的缩放因子
         if model_config.has_submodel():
-            print(f"创建子模型...")
-            print(f"  子模型使用相同的等比缩放因子: {uniform_scale_factor:.6f}")
+            log.debug("创建子模型...")
+            log.debug("  子模型使用相同的等比缩放因子: %.6f", uniform_scale_factor)
             
             submodel = load_and_setup_model(
                 context,
@@ -2434,28 +2774,29 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                 texture_base_path,
                 mapping_data,
                 is_main_model=False,
-                uniform_scale_factor=uniform_scale_factor  # 关键：使用相同的缩放因子
+                uniform_scale_factor=uniform_scale_factor,  # 关键：使用相同的缩放因子
+                cfg=cfg
             )
             if submodel:
                 # 隐藏子模型
                 submodel.hide_set(True)
                 submodel.hide_render = True
-                print(f"✓ 子模型创建成功: {submodel.name}")
+                log.debug("✓ 子模型创建成功: %s", submodel.name)
                 
                 # 检查子模型尺寸
                 if "block_size_x" in submodel:
                     sub_size_x = submodel["block_size_x"]
                     sub_size_y = submodel["block_size_y"]
                     sub_size_z = submodel["block_size_z"]
-                    print(f"  子模型实际尺寸: X={sub_size_x:.6f}, Y={sub_size_y:.6f}, Z={sub_size_z:.6f}")
+                    log.debug("  子模型实际尺寸: X=%.6f, Y=%.6f, Z=%.6f", sub_size_x, sub_size_y, sub_size_z)
                     
                     # 检查是否为整数尺寸
                     if abs(sub_size_x - round(sub_size_x)) > 0.001 or \
                        abs(sub_size_y - round(sub_size_y)) > 0.001 or \
                        abs(sub_size_z - round(sub_size_z)) > 0.001:
-                        print(f"  注意：子模型尺寸不是整数，保持等比缩放后的实际尺寸")
+                        log.debug("  注意：子模型尺寸不是整数，保持等比缩放后的实际尺寸")
             else:
-                print(f"✗ 子模型创建失败")
+                log.warning("✗ 子模型创建失败")
         
         # 3. 创建容器组（用于模板）
         if main_model or submodel:
@@ -2478,7 +2819,7 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                     template_size_z = main_model["block_size_z"]
                 else:
                     template_size_x, template_size_y, template_size_z, _ = calculate_model_dimensions(main_model)
-                print(f"  模板尺寸使用主模型: X={template_size_x:.6f}, Y={template_size_y:.6f}, Z={template_size_z:.6f}")
+                log.debug("  模板尺寸使用主模型: X=%.6f, Y=%.6f, Z=%.6f", template_size_x, template_size_y, template_size_z)
             elif submodel:
                 # 如果没有主模型，使用子模型尺寸
                 if "block_size_x" in submodel:
@@ -2487,21 +2828,20 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
                     template_size_z = submodel["block_size_z"]
                 else:
                     template_size_x, template_size_y, template_size_z, _ = calculate_model_dimensions(submodel)
-                print(f"  模板尺寸使用子模型: X={template_size_x:.6f}, Y={template_size_y:.6f}, Z={template_size_z:.6f}")
+                log.debug("  模板尺寸使用子模型: X=%.6f, Y=%.6f, Z=%.6f", template_size_x, template_size_y, template_size_z)
             
             # 将主模型和子模型设置为容器的子对象
+            # 容器是刚创建的原点空对象（单位矩阵），其逆矩阵也是单位矩阵，父级逆矩阵直接取子对象世界矩阵
             if main_model:
                 main_model.parent = container
                 # 应用变换，确保子对象相对于父容器的变换正确
-                main_matrix = main_model.matrix_world.copy()
-                main_model.matrix_parent_inverse = container.matrix_world.inverted() @ main_matrix
+                main_model.matrix_parent_inverse = main_model.matrix_world.copy()
             
             if submodel:
                 submodel.parent = container
                 # 应用变换，确保子对象相对于父容器的变换正确
-                sub_matrix = submodel.matrix_world.copy()
-                submodel.matrix_parent_inverse = container.matrix_world.inverted() @ sub_matrix
-                print(f"  子模型父级逆矩阵已设置，保持等比缩放")
+                submodel.matrix_parent_inverse = submodel.matrix_world.copy()
+                log.debug("  子模型父级逆矩阵已设置，保持等比缩放")
             
             # 存储尺寸信息到容器
             container["template_size_x"] = template_size_x
@@ -2529,23 +2869,23 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
             # 保存模板
             manager.set_template(position_id, container)
             
-            print(f"✓ 成功创建位置ID {position_id} 的模板容器: {container.name}")
-            print(f"  等比缩放因子: {uniform_scale_factor:.6f}")
-            print(f"  模板尺寸: X={template_size_x:.6f}, Y={template_size_y:.6f}, Z={template_size_z:.6f}")
+            log.debug("✓ 成功创建位置ID %s 的模板容器: %s", position_id, container.name)
+            log.debug("  等比缩放因子: %.6f", uniform_scale_factor)
+            log.debug("  模板尺寸: X=%.6f, Y=%.6f, Z=%.6f", template_size_x, template_size_y, template_size_z)
             if main_model:
-                print(f"  包含主模型: {main_model.name}")
+                log.debug("  包含主模型: %s", main_model.name)
             if submodel:
-                print(f"  包含子模型: {submodel.name}")
+                log.debug("  包含子模型: %s", submodel.name)
                 if "block_size_x" in submodel:
-                    print(f"  子模型实际尺寸: X={submodel['block_size_x']:.6f}, Y={submodel['block_size_y']:.6f}, Z={submodel['block_size_z']:.6f}")
+                    log.debug("  子模型实际尺寸: X=%.6f, Y=%.6f, Z=%.6f", submodel['block_size_x'], submodel['block_size_y'], submodel['block_size_z'])
             return container
         
         else:
-            print(f"✗ 位置ID {position_id} 没有可创建的模型")
+            log.warning("✗ 位置ID %s 没有可创建的模型", position_id)
             return None
         
     except Exception as e:
-        print(f"✗ 创建位置ID {position_id} 的模板失败: {e}")
+        log.warning("✗ 创建位置ID %s 的模板失败: %s", position_id, e)
         import traceback
         traceback.print_exc()
         
@@ -2573,116 +2913,112 @@ def create_template_for_position_id(context, position_id, texture_base_path, mod
         if current_mode != 'OBJECT':
             bpy.ops.object.mode_set(mode=current_mode)
 
+def get_template_size(template_container):
+    """读取模板尺寸 (X, Y, Z)；模板容器没有子对象时返回None"""
+    # 直接从模板容器中读取
+    if "template_size_x" in template_container:
+        size_x = template_container["template_size_x"]
+        size_y = template_container["template_size_y"]
+        size_z = template_container["template_size_z"]
+        log.debug("从模板容器读取尺寸: X=%.6f, Y=%.6f, Z=%.6f", size_x, size_y, size_z)
+        return size_x, size_y, size_z
+    
+    # 如果没有存储尺寸，尝试从子对象中获取
+    container_children = [child for child in template_container.children]
+    if not container_children:
+        log.warning("✗ 错误: 模板容器没有子对象")
+        return None
+    
+    # 使用第一个子对象的尺寸
+    child_obj = container_children[0]
+    if "block_size_x" in child_obj:
+        size_x = child_obj["block_size_x"]
+        size_y = child_obj["block_size_y"]
+        size_z = child_obj["block_size_z"]
+    else:
+        # 重新计算尺寸
+        # 临时显示子对象以计算尺寸
+        was_hidden = child_obj.hide_get()
+        child_obj.hide_set(False)
+        size_x, size_y, size_z, _ = calculate_model_dimensions(child_obj)
+        child_obj.hide_set(was_hidden)
+    log.debug("从子对象读取尺寸: X=%.6f, Y=%.6f, Z=%.6f", size_x, size_y, size_z)
+    return size_x, size_y, size_z
+
+def get_block_name(position_id, x, y, z):
+    """获取方块容器的对象名称"""
+    return f"Block_{position_id}_{x}_{y}_{z}"
+
 def create_block_from_template(context, position_id, x, y, z, base_block_size, 
-                              direction_mode='EAST', use_model_center=False):
+                              direction_mode='EAST', use_model_center=False, cfg=None, created=None,
+                              template_container=None, template_children=None):
     """从模板创建方块（支持主模型+子模型系统）- 修复：完全修复尺寸问题"""
-    print(f"\n创建方块: 位置ID={position_id}, 坐标=({x},{y},{z}), 方向={direction_mode}")
+    log.debug("创建方块: 位置ID=%s, 坐标=(%s,%s,%s), 方向=%s", position_id, x, y, z, direction_mode)
     
-    block_name = f"Block_{position_id}_{x}_{y}_{z}"
+    block_name = get_block_name(position_id, x, y, z)
     
-    # 检查是否已存在
-    if block_name in bpy.data.objects:
-        print(f"方块已存在: {block_name}")
-        return bpy.data.objects[block_name]
+    # 检查是否已存在（批量生成时查调用方维护的名称集合，不逐个查询bpy.data）
+    exists = block_name in created if created is not None else block_name in bpy.data.objects
+    if exists:
+        existing = bpy.data.objects.get(block_name)
+        if existing is not None:
+            log.debug("方块已存在: %s", block_name)
+            return existing
     
-    # 获取位置ID对应的模板容器
-    manager = BlockModelManager()
-    template_container = manager.get_template(position_id)
+    # 获取位置ID对应的模板容器（批量生成时由调用方直接传入）
+    if template_container is None:
+        template_container = _BLOCK_MANAGER.get_template(position_id)
     
     if not template_container:
-        print(f"✗ 错误: 找不到位置ID {position_id} 的模板")
+        log.warning("✗ 错误: 找不到位置ID %s 的模板", position_id)
         return None
     
-    # 获取模板尺寸 - 直接从模板容器中读取
-    if "template_size_x" in template_container:
-        size_x = template_container["template_size_x"]
-        size_y = template_container["template_size_y"]
-        size_z = template_container["template_size_z"]
-        print(f"从模板容器读取尺寸: X={size_x:.6f}, Y={size_y:.6f}, Z={size_z:.6f}")
-    else:
-        # 如果没有存储尺寸，尝试从子对象中获取
-        container_children = [child for child in template_container.children]
-        if not container_children:
-            print(f"✗ 错误: 模板容器没有子对象")
-            return None
-        
-        # 使用第一个子对象的尺寸
-        child_obj = container_children[0]
-        if "block_size_x" in child_obj:
-            size_x = child_obj["block_size_x"]
-            size_y = child_obj["block_size_y"]
-            size_z = child_obj["block_size_z"]
-        else:
-            # 重新计算尺寸
-            # 临时显示子对象以计算尺寸
-            was_hidden = child_obj.hide_get()
-            child_obj.hide_set(False)
-            size_x, size_y, size_z, _ = calculate_model_dimensions(child_obj)
-            child_obj.hide_set(was_hidden)
-        print(f"从子对象读取尺寸: X={size_x:.6f}, Y={size_y:.6f}, Z={size_z:.6f}")
+    # 获取模板尺寸
+    size = get_template_size(template_container)
+    if size is None:
+        return None
+    size_x, size_y, size_z = size
     
-    print(f"模型尺寸: X={size_x:.6f}, Y={size_y:.6f}, Z={size_z:.6f}")
-    print(f"基础网格大小: {base_block_size}")
+    log.debug("模型尺寸: X=%.6f, Y=%.6f, Z=%.6f", size_x, size_y, size_z)
+    log.debug("基础网格大小: %s", base_block_size)
     
     # 获取设置以确定是否使用相邻模式
-    settings = context.scene.block_generator_settings
-    adjacent_mode = settings.adjacent_mode
+    if cfg is None:
+        cfg = read_generator_config(context)
+    adjacent_mode = cfg.adjacent_mode
     
     # 根据模型尺寸和基础网格大小计算世界坐标
-    world_x, world_y, world_z = get_world_coordinate_for_model(
-        (x, y, z), base_block_size, size_x, size_y, size_z,
-        direction_mode, use_model_center, adjacent_mode
-    )
+    place = get_placement_fn(base_block_size, size_x, size_y, size_z,
+                             adjacent_mode, use_model_center)
+    world_x, world_y, world_z = place(x, y, z)
     
     # 获取旋转角度
     rotation_y = get_rotation_for_direction(direction_mode)
     
-    original_selection = list(context.selected_objects)
-    original_active = context.active_object
-    
     try:
-        # 清除所有选择
-        bpy.ops.object.select_all(action='DESELECT')
-        
-        # 复制模板容器及其所有子对象
-        print(f"复制模板容器: {template_container.name}")
-        
-        # 先显示模板容器及其子对象
-        template_container.hide_set(False)
-        for child in template_container.children:
-            child.hide_set(False)
-        
-        # 选择模板容器及其所有子对象
-        template_container.select_set(True)
-        for child in template_container.children:
-            child.select_set(True)
-        
-        context.view_layer.objects.active = template_container
-        
-        # 复制选中的对象
-        bpy.ops.object.duplicate()
-        
-        # 获取复制的容器
-        duplicated_objs = [obj for obj in context.selected_objects]
-        new_container = None
-        
-        # 查找复制的容器（EMPTY类型）
-        for obj in duplicated_objs:
-            if obj.type == 'EMPTY' and obj.name.startswith(f"{template_container.name}."):
-                new_container = obj
-                new_container.name = block_name
-                break
-        
-        if not new_container:
-            # 如果没有找到空的容器对象，创建一个新的空对象作为容器
-            new_container = bpy.data.objects.new(block_name, None)
-            context.collection.objects.link(new_container)
-            
-            # 将复制的对象设置为新容器的子对象
-            for obj in duplicated_objs:
-                if obj != new_container:
-                    obj.parent = new_container
-                    obj.matrix_parent_inverse = new_container.matrix_world.inverted() @ obj.matrix_world.copy()
+        # 在数据层直接复制模板容器及其子对象：子对象为关联副本（共用模板网格数据），
+        # 不调用 bpy.ops.object.duplicate，不改动选择状态，也不为每个方块触发一次场景更新
+        log.debug("复制模板容器: %s", template_container.name)
+        
+        collection = context.collection
+        new_container = template_container.copy()
+        new_container.name = block_name
+        collection.objects.link(new_container)
+        
+        # Object.children 每次都要遍历整个bpy.data.objects，批量生成时由调用方按模板缓存
+        if template_children is None:
+            template_children = template_container.children
+        new_children = []
+        for child in template_children:
+            new_child = child.copy()  # 保留局部变换和父级逆矩阵
+            collection.objects.link(new_child)
+            new_child.parent = new_container
+            # 重命名子对象
+            if child.name.startswith("BlockMain_"):
+                new_child.name = f"BlockMain_{position_id}_{x}_{y}_{z}"
+            elif child.name.startswith("BlockSub_"):
+                new_child.name = f"BlockSub_{position_id}_{x}_{y}_{z}"
+            new_children.append(new_child)
         
         # 设置新容器的位置和旋转
         # 不使用四舍五入，保持原始精度
@@ -2699,51 +3035,109 @@ def create_block_from_template(context, position_id, x, y, z, base_block_size,
         new_container["model_size_y"] = size_y
         new_container["model_size_z"] = size_z
         
-        # 重命名子对象
-        for child in new_container.children:
-            if child.name.startswith("BlockMain_"):
-                child.name = f"BlockMain_{position_id}_{x}_{y}_{z}"
-            elif child.name.startswith("BlockSub_"):
-                child.name = f"BlockSub_{position_id}_{x}_{y}_{z}"
-        
-        # 重新隐藏模板容器及其子对象
-        template_container.hide_set(True)
-        for child in template_container.children:
-            child.hide_set(True)
-        
-        print(f"✓ 成功创建方块容器: {new_container.name}")
-        print(f"位置: ({world_x:.6f}, {world_y:.6f}, {world_z:.6f})")
-        print(f"旋转: {rotation_y:.6f} 弧度 ({direction_mode}方向)")
-        print(f"包含 {len(new_container.children)} 个子对象:")
-        for child in new_container.children:
-            print(f"  - {child.name} ({child.type})")
+        log.debug("✓ 成功创建方块容器: %s", new_container.name)
+        log.debug("位置: (%.6f, %.6f, %.6f)", world_x, world_y, world_z)
+        log.debug("旋转: %.6f 弧度 (%s方向)", rotation_y, direction_mode)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("包含 %s 个子对象:", len(new_children))
+            for child in new_children:
+                log.debug("  - %s (%s)", child.name, child.type)
         
+        if created is not None:
+            created.add(new_container.name)
         return new_container
         
     except Exception as e:
-        print(f"✗ 创建方块时出错: {e}")
+        log.warning("✗ 创建方块时出错: %s", e)
         import traceback
         traceback.print_exc()
-        
-        # 确保模板容器被重新隐藏
-        if template_container:
-            template_container.hide_set(True)
-            for child in template_container.children:
-                child.hide_set(True)
-        
+        return None
+
+def batch_instantiate(context, position_id, transforms):
+    """把同一模板的多个方块合并成一个网格对象（静态合批），transforms为每个方块的世界矩阵"""
+    template_container = _BLOCK_MANAGER.get_template(position_id)
+    if not template_container or not transforms:
+        return None
+    
+    parts = [child for child in template_container.children if child.type == 'MESH']
+    if not parts:
+        log.warning("✗ 错误: 模板容器没有网格子对象")
         return None
     
+    bm = bmesh.new()
+    materials = []
+    slot_of = {}  # 材质指针 -> 合并后网格的槽位
+    try:
+        for part in parts:
+            # 各子模型的材质槽映射到合并网格的共享槽位
+            remap = []
+            for material in part.data.materials:
+                key = material.as_pointer() if material else 0
+                if key not in slot_of:
+                    slot_of[key] = len(materials)
+                    materials.append(material)
+                remap.append(slot_of[key])
+            identity = remap == list(range(len(remap)))
+            
+            local = part.matrix_local
+            for transform in transforms:
+                vert_start = len(bm.verts)
+                face_start = len(bm.faces)
+                bm.from_mesh(part.data)  # 追加到已有BMesh末尾
+                bm.verts.ensure_lookup_table()
+                bm.faces.ensure_lookup_table()
+                bmesh.ops.transform(bm, matrix=transform @ local, verts=bm.verts[vert_start:])
+                if not identity:
+                    for face in bm.faces[face_start:]:
+                        face.material_index = remap[face.material_index]
+        
+        mesh = bpy.data.meshes.new(f"Block_Batch_{position_id}")
+        bm.to_mesh(mesh)
     finally:
-        # 恢复原始选择状态
-        try:
-            bpy.ops.object.select_all(action='DESELECT')
-            for obj in original_selection:
-                if obj and obj.name in bpy.data.objects:
-                    obj.select_set(True)
-            if original_active and original_active.name in bpy.data.objects:
-                context.view_layer.objects.active = original_active
-        except:
-            pass
+        bm.free()
+    
+    for material in materials:
+        mesh.materials.append(material)
+    
+    batch_obj = bpy.data.objects.new(mesh.name, mesh)
+    context.collection.objects.link(batch_obj)
+    batch_obj["position_id"] = position_id
+    batch_obj["block_count"] = len(transforms)
+    
+    log.debug("✓ 合并生成 %s 个方块: %s（%s 个面）", len(transforms), batch_obj.name, len(mesh.polygons))
+    return batch_obj
+
+def create_block_batch(context, position_id, cells, base_block_size,
+                       direction_mode='EAST', use_model_center=False, cfg=None):
+    """按网格坐标列表合批生成同一位置ID的全部方块，返回合并对象"""
+    template_container = _BLOCK_MANAGER.get_template(position_id)
+    if not template_container:
+        log.warning("✗ 错误: 找不到位置ID %s 的模板", position_id)
+        return None
+    
+    size = get_template_size(template_container)
+    if size is None:
+        return None
+    
+    if cfg is None:
+        cfg = read_generator_config(context)
+    positions = get_world_coordinates_batch(cells, base_block_size, *size,
+                                            use_model_center, cfg.adjacent_mode)
+    rotation = Matrix.Rotation(get_rotation_for_direction(direction_mode), 4, 'Y')
+    transforms = [Matrix.Translation(position) @ rotation for position in positions.tolist()]
+    
+    # 重新生成时替换上一次的合并对象
+    old = bpy.data.objects.get(f"Block_Batch_{position_id}")
+    if old is not None:
+        old_mesh = old.data
+        bpy.data.objects.remove(old, do_unlink=True)
+        if old_mesh is not None and old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+    
+    batch_obj = batch_instantiate(context, position_id, transforms)
+    if batch_obj is not None:
+        batch_obj["direction"] = direction_mode
+    return batch_obj
 
 # ============================================================================
 # 属性组定义
@@ -2773,6 +3167,37 @@ class BlockModelItem(bpy.types.PropertyGroup):
 class BlockGeneratorSettings(bpy.types.PropertyGroup):
     """方块生成器的设置"""
     
+    # 坐标与路径（改变路径时丢弃面板的检查结果，短时缓存只用于兜底磁盘上的外部改动）
+    grid_coordinates: bpy.props.StringProperty(
+        name="坐标信息",
+        description="方块位置信息，格式: x,y,z,id (id在最后，对应位置ID)",
+        default="",
+    )
+    
+    texture_base_path: bpy.props.StringProperty(
+        name="贴图基础路径",
+        description="贴图文件的基础路径，例如: F:/Project/blender/pluge/black/",
+        default="",
+        subtype='DIR_PATH',
+        update=lambda self, context: _PANEL_EXISTS_CACHE.clear()
+    )
+    
+    models_base_path: bpy.props.StringProperty(
+        name="模型基础路径",
+        description="模型文件的基础路径，例如: F:/Project/blender/pluge/",
+        default="",
+        subtype='DIR_PATH',
+        update=lambda self, context: _PANEL_EXISTS_CACHE.clear()
+    )
+    
+    mapping_table_path: bpy.props.StringProperty(
+        name="映射表路径",
+        description="映射表文件路径",
+        default="",
+        subtype='FILE_PATH',
+        update=lambda self, context: _PANEL_EXISTS_CACHE.clear()
+    )
+    
     # 比例模式枚举
     scale_mode_items = [
         ('ORIGINAL', "保持原始比例", "保持模型导入时的原始尺寸"),
@@ -2841,6 +3266,28 @@ class BlockGeneratorSettings(bpy.types.PropertyGroup):
         default=True  # 默认启用相邻模式
     )
     
+    # 合批生成
+    batch_blocks: bpy.props.BoolProperty(
+        name="合并同类方块",
+        description="同一位置ID的方块合并为一个网格对象，减少对象数量；合并后不能单独选择方块",
+        default=False
+    )
+    
+    # 详细日志
+    verbose_logging: bpy.props.BoolProperty(
+        name="详细日志",
+        description="在控制台输出每个方块、模板和材质的调试信息（方块很多时会明显变慢）",
+        default=False,
+        update=lambda self, context: set_verbose_logging(self.verbose_logging)
+    )
+    
+    # 面板说明折叠
+    show_help: bpy.props.BoolProperty(
+        name="显示说明",
+        description="展开面板底部的格式与功能说明",
+        default=False
+    )
+    
     # 自发光强度设置
     emission_strength: bpy.props.FloatProperty(
         name="自发光强度",
@@ -2881,59 +3328,53 @@ class OBJECT_OT_load_block_models(bpy.types.Operator):
         
         print(f"\n正在扫描模型文件夹: {self.directory}")
         
-        # 清空现有模型列表
-        scene.block_models.clear()
-        
-        # 扫描文件夹中的OBJ文件
-        loaded_count = 0
-        
-        # 首先检查是否存在block.obj文件（主模型）
-        block_obj_path = os.path.join(self.directory, "block.obj")
-        if os.path.exists(block_obj_path):
-            # 添加主模型
-            item = scene.block_models.add()
-            item.id = 0
-            item.name = "block"
-            item.filepath = block_obj_path
-            item.color = (0.8, 0.4, 0.1)
-            item.scale_factor = 1.0
-            loaded_count += 1
-            print(f"✓ 找到主模型: block.obj")
-        
-        # 扫描所有OBJ文件
-        for filename in os.listdir(self.directory):
-            if filename.lower().endswith('.obj'):
-                # 跳过已经添加的block.obj
-                if filename.lower() == 'block.obj':
+        # 扫描文件夹中的OBJ文件：一次scandir枚举，同时找出block.obj（主模型）
+        block_obj_entry = None
+        obj_entries = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                base_name, ext = os.path.splitext(entry.name)
+                if ext.lower() != '.obj' or not entry.is_file(follow_symlinks=False):
                     continue
-                
-                base_name = os.path.splitext(filename)[0]
-                block_id = 0
-                
-                # 尝试从文件名提取ID
-                numbers = re.findall(r'\d+', base_name)
-                if numbers:
-                    block_id = int(numbers[0])
+                if base_name.lower() == 'block':
+                    block_obj_entry = entry
                 else:
-                    # 如果文件名没有数字，使用加载顺序+1（避免与block.obj的ID 0冲突）
-                    block_id = loaded_count + 1
-                
-                filepath = os.path.join(self.directory, filename)
-                
-                # 添加到模型列表
-                item = scene.block_models.add()
-                item.id = block_id
-                item.name = base_name
-                item.filepath = filepath
-                item.color = (0.8, 0.4, 0.1)
-                item.scale_factor = 1.0
-                
-                loaded_count += 1
-                print(f"✓ 找到模型: {filename} (ID: {block_id})")
+                    obj_entries.append((base_name, entry))
+        
+        # (ID, 名称, 路径)；先收集再按ID排序一次写入模型列表
+        found_models = []
+        if block_obj_entry is not None:
+            found_models.append((0, "block", block_obj_entry.path))
+            print(f"✓ 找到主模型: block.obj")
+        
+        for base_name, entry in obj_entries:
+            block_id = 0
+            
+            # 尝试从文件名提取ID
+            match = _DIGITS_RE.search(base_name)
+            if match:
+                block_id = int(match.group())
+            else:
+                # 如果文件名没有数字，使用加载顺序+1（避免与block.obj的ID 0冲突）
+                block_id = len(found_models) + 1
+            
+            found_models.append((block_id, base_name, entry.path))
+            print(f"✓ 找到模型: {entry.name} (ID: {block_id})")
+        
+        # 扫描完成后再清空并重建模型列表：按ID排序一次，逐项只写非默认值
+        # （颜色和缩放因子与BlockModelItem的默认值相同，新建项无需再赋值）
+        found_models.sort(key=lambda model: model[0])
+        block_models = scene.block_models
+        block_models.clear()
+        add_model = block_models.add
+        for block_id, base_name, filepath in found_models:
+            item = add_model()
+            item.id = block_id
+            item.name = base_name
+            item.filepath = filepath
+        loaded_count = len(found_models)
         
         if loaded_count > 0:
-            # 按ID排序
-            scene.block_models.sort(key=lambda x: x.id)
             self.report({'INFO'}, f"已找到 {loaded_count} 个OBJ模型")
             print(f"总计找到 {loaded_count} 个模型文件")
         else:
@@ -2945,9 +3386,10 @@ class OBJECT_OT_load_block_models(bpy.types.Operator):
     def invoke(self, context, event):
         # 设置默认目录（如果之前设置过贴图路径，则使用其父目录）
         scene = context.scene
-        if scene.texture_base_path:
+        settings = scene.block_generator_settings
+        if settings.texture_base_path:
             # 尝试使用贴图路径的父目录作为默认目录
-            default_dir = os.path.dirname(scene.texture_base_path.rstrip('/\\'))
+            default_dir = os.path.dirname(settings.texture_base_path.rstrip('/\\'))
             if os.path.exists(default_dir):
                 self.directory = default_dir
         
@@ -2971,6 +3413,7 @@ class OBJECT_OT_set_texture_base_path(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
         if not self.directory:
             self.report({'WARNING'}, "请选择文件夹")
@@ -2980,7 +3423,7 @@ class OBJECT_OT_set_texture_base_path(bpy.types.Operator):
             self.report({'ERROR'}, f"目录不存在: {self.directory}")
             return {'CANCELLED'}
         
-        scene.texture_base_path = self.directory
+        settings.texture_base_path = self.directory
         self.report({'INFO'}, f"贴图基础路径已设置为: {self.directory}")
         
         return {'FINISHED'}
@@ -3001,6 +3444,7 @@ class OBJECT_OT_set_models_base_path(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
         if not self.directory:
             self.report({'WARNING'}, "请选择文件夹")
@@ -3010,7 +3454,7 @@ class OBJECT_OT_set_models_base_path(bpy.types.Operator):
             self.report({'ERROR'}, f"目录不存在: {self.directory}")
             return {'CANCELLED'}
         
-        scene.models_base_path = self.directory
+        settings.models_base_path = self.directory
         self.report({'INFO'}, f"模型基础路径已设置为: {self.directory}")
         
         return {'FINISHED'}
@@ -3032,13 +3476,14 @@ class OBJECT_OT_load_mapping_table(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
         try:
             # 加载映射表
-            manager = BlockModelManager()
+            manager = _BLOCK_MANAGER
             manager.set_mapping_table(self.filepath)
             
-            scene.mapping_table_path = self.filepath
+            settings.mapping_table_path = self.filepath
             mapping_count = manager.get_mapping_count()
             self.report({'INFO'}, f"已加载映射表，共 {mapping_count} 个条目")
             return {'FINISHED'}
@@ -3059,18 +3504,19 @@ class OBJECT_OT_reload_mapping_table(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
-        if not scene.mapping_table_path:
+        if not settings.mapping_table_path:
             self.report({'WARNING'}, "没有设置映射表路径")
             return {'CANCELLED'}
         
-        if not os.path.exists(scene.mapping_table_path):
-            self.report({'ERROR'}, f"映射表文件不存在: {scene.mapping_table_path}")
+        if not os.path.exists(settings.mapping_table_path):
+            self.report({'ERROR'}, f"映射表文件不存在: {settings.mapping_table_path}")
             return {'CANCELLED'}
         
         try:
             # 重新加载映射表
-            manager = BlockModelManager()
+            manager = _BLOCK_MANAGER
             success = manager.reload_mapping_table(scene)
             
             if success:
@@ -3102,19 +3548,22 @@ class OBJECT_OT_import_positions(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
         try:
-            # 读取文件内容
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # 读取文件内容：二进制一次读入再整体解码，省去文本模式的逐行换行转换
+            with open(self.filepath, 'rb') as f:
+                content = f.read().decode('utf-8')
+            if '\r' in content:
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
             
-            # 直接使用文件内容
-            scene.grid_coordinates = content
-            
-            # 解析坐标以显示统计信息
+            # 解析坐标以显示统计信息；结果会被缓存，生成和面板绘制时不再重复解析同一份文本
             coordinates = parse_coordinate_string(content)
             
-            self.report({'INFO'}, f"已导入 {len(coordinates)} 个位置信息")
+            # 直接使用文件内容
+            settings.grid_coordinates = content
+            
+            self.report({'INFO'}, f"已导入 {coordinates.ids.size} 个位置信息")
             return {'FINISHED'}
             
         except Exception as e:
@@ -3133,44 +3582,57 @@ class OBJECT_OT_generate_from_grid(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
-        if not scene.grid_coordinates.strip():
+        # 设置属性每次读取都经过RNA（字符串属性还会整段复制），循环用到的值先取成局部变量
+        grid_text = settings.grid_coordinates
+        if not grid_text.strip():
             self.report({'WARNING'}, "请输入坐标")
             return {'CANCELLED'}
         
-        coordinates = parse_coordinate_string(scene.grid_coordinates)
+        coordinates = parse_coordinate_string(grid_text)
+        num_coordinates = coordinates.ids.size
         
-        if not coordinates:
+        if num_coordinates == 0:
             self.report({'WARNING'}, "没有找到有效的坐标")
             return {'CANCELLED'}
         
-        settings = scene.block_generator_settings
-        base_block_size = settings.base_block_size
+        # 整个批次只读一次设置，传给模板创建和逐方块生成
+        cfg = read_generator_config(context)
+        verbose = settings.verbose_logging
+        set_verbose_logging(verbose)
+        base_block_size = cfg.base_block_size
         
         # 检查必要的路径
-        if not scene.models_base_path:
+        models_base_path = settings.models_base_path
+        texture_base_path = settings.texture_base_path
+        if not models_base_path:
             self.report({'ERROR'}, "请先设置模型基础路径")
             return {'CANCELLED'}
         
-        if not scene.texture_base_path:
+        if not texture_base_path:
             self.report({'ERROR'}, "请先设置贴图基础路径")
             return {'CANCELLED'}
         
         # 获取管理器实例
-        manager = BlockModelManager()
+        manager = _BLOCK_MANAGER
+        
+        # 磁盘上的模型/贴图文件可能已变化，重新列目录
+        manager.clear_dir_cache()
+        invalidate_face_cache()
         
         # 修复：检查并重新加载映射表
-        if not manager._mapping_table and scene.mapping_table_path:
-            print(f"重新加载映射表: {scene.mapping_table_path}")
-            manager.set_mapping_table(scene.mapping_table_path)
+        if not manager._mapping_table and settings.mapping_table_path:
+            print(f"重新加载映射表: {settings.mapping_table_path}")
+            manager.set_mapping_table(settings.mapping_table_path)
         
         if not manager._mapping_table:
             self.report({'WARNING'}, "没有加载映射表，将使用默认配置")
         
         print(f"\n{'='*60}")
-        print(f"开始生成 {len(coordinates)} 个方块")
-        print(f"贴图基础路径: {scene.texture_base_path}")
-        print(f"模型基础路径: {scene.models_base_path}")
+        print(f"开始生成 {num_coordinates} 个方块")
+        print(f"贴图基础路径: {texture_base_path}")
+        print(f"模型基础路径: {models_base_path}")
         print(f"基础网格大小: {base_block_size}")
         print(f"方块方向: {settings.direction_mode}")
         print(f"定位模式: {settings.positioning_mode}")
@@ -3182,26 +3644,54 @@ class OBJECT_OT_generate_from_grid(bpy.types.Operator):
         print(f"映射表条目数: {manager.get_mapping_count()}")
         
         # 统计所需的位置ID
-        required_ids = set(coord['id'] for coord in coordinates)
-        print(f"位置表中需要的位置ID列表: {sorted(required_ids)}")
+        # np.unique 的结果已去重且有序，不必再转集合后排序
+        required_ids = np.unique(coordinates.ids).tolist()
+        if verbose:
+            print(f"位置表中需要的位置ID列表: {required_ids}")
+        else:
+            print(f"位置表中需要 {len(required_ids)} 个位置ID")
+        
+        # 在创建模板前并行预读尚未建模板的位置ID所需的贴图，同时按建模板顺序收集OBJ路径
+        texture_paths = set()
+        model_paths = {}
+        for position_id in required_ids:
+            if not manager.has_template_for_id(position_id):
+                model_config = manager.get_or_build_config(position_id, texture_base_path, models_base_path)
+                texture_paths |= model_config.get_all_texture_paths()
+                if model_config.has_main_model():
+                    model_paths[model_config.main_model_path] = None
+                if model_config.has_submodel():
+                    model_paths[model_config.submodel_path] = None
+        prewarm_textures(texture_paths)
         
         # 为每个位置ID创建模板（支持主模型+子模型系统）
+        # OBJ导入必须在主线程执行；后台线程提前读入后续模型文件，主线程导入时直接命中系统文件缓存
         print(f"\n为每个位置ID创建模板（支持主模型+子模型系统，等比缩放）...")
         templates_created = 0
-        for position_id in required_ids:
-            template = create_template_for_position_id(
-                context, 
-                position_id, 
-                scene.texture_base_path,
-                scene.models_base_path
-            )
-            if template:
-                templates_created += 1
-                print(f"✓ 创建位置ID {position_id} 的模板成功: {template.name}")
-                if "uniform_scale_factor" in template:
-                    print(f"  等比缩放因子: {template['uniform_scale_factor']:.6f}")
-            else:
-                print(f"✗ 创建位置ID {position_id} 的模板失败")
+        templates_by_id = {}  # 本次用到的模板，生成循环里直接取用，不再按ID查管理器
+        with ThreadPoolExecutor(max_workers=4) as model_prefetch:
+            for path in model_paths:
+                model_prefetch.submit(_read_file_into_page_cache, path)
+            
+            for position_id in required_ids:
+                template = create_template_for_position_id(
+                    context, 
+                    position_id, 
+                    texture_base_path,
+                    models_base_path,
+                    cfg=cfg
+                )
+                if template:
+                    templates_created += 1
+                    templates_by_id[position_id] = template
+                    print(f"✓ 创建位置ID {position_id} 的模板成功: {template.name}")
+                    if "uniform_scale_factor" in template:
+                        print(f"  等比缩放因子: {template['uniform_scale_factor']:.6f}")
+                else:
+                    print(f"✗ 创建位置ID {position_id} 的模板失败")
+        
+        # 所有模板的材质分配完成后统一刷新网格
+        finalize_materials()
         
         if templates_created == 0:
             self.report({'ERROR'}, "没有成功创建任何模板")
@@ -3212,38 +3702,96 @@ class OBJECT_OT_generate_from_grid(bpy.types.Operator):
         # 生成方块
         generated_count = 0
         failed_count = 0
+        skipped_count = 0
         
         # 确定定位模式
         use_model_center = (settings.positioning_mode == 'MODEL_CENTER')
+        direction_mode = settings.direction_mode
         
-        for i, coord in enumerate(coordinates):
-            position_id = coord['id']
-            x = coord['x']
-            y = coord['y']
-            z = coord['z']
-            
-            print(f"\n生成方块 {i+1}/{len(coordinates)}: 位置ID={position_id}, 坐标=({x},{y},{z})")
-            
-            block = create_block_from_template(
-                context, 
-                position_id, 
-                x, y, z, 
-                base_block_size,
-                settings.direction_mode,
-                use_model_center
-            )
-            
-            if block:
-                generated_count += 1
-                print(f"✓ 成功生成方块 {generated_count}")
+        # 按位置ID稳定排序，同一模板的方块连续生成（模板、尺寸和换算函数连续命中缓存）
+        order = np.argsort(coordinates.ids, kind='stable')
+        rows = zip(coordinates.ids[order].tolist(), coordinates.x[order].tolist(),
+                   coordinates.y[order].tolist(), coordinates.z[order].tolist())
+        
+        # 长时间生成时在状态栏显示进度；异常退出也要结束进度条
+        wm = context.window_manager
+        wm.progress_begin(0, num_coordinates)
+        try:
+            if settings.batch_blocks:
+                # 合批模式：同一位置ID的方块合并为一个网格对象（重复坐标只生成一次，与逐个生成一致）
+                cells_by_id = defaultdict(dict)
+                for position_id, x, y, z in rows:
+                    cells_by_id[position_id][(x, y, z)] = None
+                for position_id, cells in cells_by_id.items():
+                    cells = list(cells)
+                    block = create_block_batch(
+                        context,
+                        position_id,
+                        cells,
+                        base_block_size,
+                        direction_mode,
+                        use_model_center,
+                        cfg=cfg
+                    )
+                    if block:
+                        generated_count += len(cells)
+                    else:
+                        failed_count += len(cells)
+                        print(f"✗ 合批生成失败: 位置ID={position_id}")
+                    wm.progress_update(generated_count + failed_count)
             else:
-                failed_count += 1
-                print(f"✗ 生成方块失败: 位置ID={position_id}")
+                # 场景中已有的方块名称只收集一次，逐个生成时用集合判断是否已存在
+                created = {obj.name for obj in bpy.data.objects if obj.name.startswith(_BLOCK_PREFIX)}
+                # 模板子对象列表每个模板只取一次（Object.children 的开销随场景对象数线性增长）
+                children_by_id = {position_id: tuple(template.children)
+                                  for position_id, template in templates_by_id.items()}
+                # 非详细模式只按约5%的间隔输出进度
+                progress_step = max(1, num_coordinates // 20)
+                for i, (position_id, x, y, z) in enumerate(rows):
+                    # 进度条按固定步长刷新，更新本身也有开销
+                    if i % 64 == 0:
+                        wm.progress_update(i)
+                    
+                    # 上次生成的方块仍在场景中：直接计为成功，不再进入创建流程
+                    if get_block_name(position_id, x, y, z) in created:
+                        generated_count += 1
+                        skipped_count += 1
+                        continue
+                    
+                    if verbose:
+                        print(f"\n生成方块 {i+1}/{num_coordinates}: 位置ID={position_id}, 坐标=({x},{y},{z})")
+                    elif (i + 1) % progress_step == 0 or i + 1 == num_coordinates:
+                        print(f"生成进度: {i+1}/{num_coordinates}")
+                    
+                    block = create_block_from_template(
+                        context, 
+                        position_id, 
+                        x, y, z, 
+                        base_block_size,
+                        direction_mode,
+                        use_model_center,
+                        cfg=cfg,
+                        created=created,
+                        template_container=templates_by_id.get(position_id),
+                        template_children=children_by_id.get(position_id)
+                    )
+                    
+                    if block:
+                        generated_count += 1
+                        if verbose:
+                            print(f"✓ 成功生成方块 {generated_count}")
+                    else:
+                        failed_count += 1
+                        print(f"✗ 生成方块失败: 位置ID={position_id}")
+        finally:
+            wm.progress_end()
         
         print(f"\n{'='*60}")
         print(f"生成完成:")
         print(f"成功: {generated_count} 个")
         print(f"失败: {failed_count} 个")
+        if skipped_count:
+            print(f"已存在（跳过）: {skipped_count} 个")
         print(f"等比缩放: 已启用")
         
         if generated_count > 0:
@@ -3260,19 +3808,12 @@ class OBJECT_OT_clear_all_blocks(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
     
     def execute(self, context):
-        blocks_removed = 0
-        
-        blocks_to_remove = []
-        for obj in bpy.data.objects:
-            if obj.name.startswith("Block_") and not obj.name.startswith("BlockTemplate_"):
-                blocks_to_remove.append(obj)
+        # "Block_"本身不会匹配模板前缀，一次前缀判断即可
+        blocks_to_remove = [obj for obj in bpy.data.objects if obj.name.startswith(_BLOCK_PREFIX)]
         
-        for obj in blocks_to_remove:
-            try:
-                bpy.data.objects.remove(obj, do_unlink=True)
-                blocks_removed += 1
-            except:
-                pass
+        # 一次批量删除，只触发一次依赖图更新
+        bpy.data.batch_remove(ids=blocks_to_remove)
+        blocks_removed = len(blocks_to_remove)
         
         self.report({'INFO'}, f"已删除 {blocks_removed} 个方块")
         return {'FINISHED'}
@@ -3285,41 +3826,26 @@ class OBJECT_OT_clear_all_templates(bpy.types.Operator):
     
     def execute(self, context):
         # 获取管理器
-        manager = BlockModelManager()
+        manager = _BLOCK_MANAGER
         
         # 只清除模板和模型配置，保留映射表
         manager.clear_templates_and_configs()
         
         # 删除模板对象
-        templates_removed = 0
-        templates_to_remove = []
-        for obj in bpy.data.objects:
-            if obj.name.startswith("BlockTemplate_") or obj.name.startswith("BlockMain_") or obj.name.startswith("BlockSub_"):
-                templates_to_remove.append(obj)
-        
-        for obj in templates_to_remove:
-            try:
-                bpy.data.objects.remove(obj, do_unlink=True)
-                templates_removed += 1
-            except:
-                pass
+        templates_to_remove = [obj for obj in bpy.data.objects if obj.name.startswith(_TEMPLATE_PREFIXES)]
+        bpy.data.batch_remove(ids=templates_to_remove)
+        templates_removed = len(templates_to_remove)
         
         # 清理未使用的材质（只清理用户数为0的材质）
-        materials_removed = 0
-        materials_to_remove = []
-        for mat in bpy.data.materials:
-            if mat.name.startswith("BlockMat_") and mat.users == 0:
-                materials_to_remove.append(mat)
-        
-        for mat in materials_to_remove:
-            try:
-                bpy.data.materials.remove(mat)
-                materials_removed += 1
-            except:
-                pass
+        materials_to_remove = [mat for mat in bpy.data.materials
+                               if mat.name.startswith("BlockMat_") and mat.users == 0]
+        bpy.data.batch_remove(ids=materials_to_remove)
+        materials_removed = len(materials_to_remove)
         
         # 清理管理器中的材质缓存
         manager._materials.clear()
+        manager._mat_by_signature.clear()
+        clear_node_tree_templates()
         manager._loaded_textures.clear()
         
         self.report({'INFO'}, f"已清除 {templates_removed} 个模板模型和 {materials_removed} 个未使用的材质")
@@ -3333,39 +3859,27 @@ class OBJECT_OT_clear_all_templates_and_mapping(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
         # 获取管理器
-        manager = BlockModelManager()
+        manager = _BLOCK_MANAGER
         
         # 清除所有数据（包括映射表）
         manager.clear_all()
         
         # 删除模板对象
-        templates_removed = 0
-        templates_to_remove = []
-        for obj in bpy.data.objects:
-            if obj.name.startswith("BlockTemplate_") or obj.name.startswith("BlockMain_") or obj.name.startswith("BlockSub_"):
-                templates_to_remove.append(obj)
-        
-        for obj in templates_to_remove:
-            try:
-                bpy.data.objects.remove(obj, do_unlink=True)
-                templates_removed += 1
-            except:
-                pass
+        templates_to_remove = [obj for obj in bpy.data.objects if obj.name.startswith(_TEMPLATE_PREFIXES)]
+        bpy.data.batch_remove(ids=templates_to_remove)
+        templates_removed = len(templates_to_remove)
         
         # 清理未使用的材质
-        materials_removed = 0
-        for mat in list(bpy.data.materials):
-            if mat.name.startswith("BlockMat_") and mat.users == 0:
-                try:
-                    bpy.data.materials.remove(mat)
-                    materials_removed += 1
-                except:
-                    pass
+        materials_to_remove = [mat for mat in bpy.data.materials
+                               if mat.name.startswith("BlockMat_") and mat.users == 0]
+        bpy.data.batch_remove(ids=materials_to_remove)
+        materials_removed = len(materials_to_remove)
         
         # 清空映射表路径
-        scene.mapping_table_path = ""
+        settings.mapping_table_path = ""
         
         self.report({'INFO'}, f"已清除 {templates_removed} 个模板模型和 {materials_removed} 个未使用的材质，并清空映射表")
         return {'FINISHED'}
@@ -3395,21 +3909,22 @@ class OBJECT_OT_debug_position_calculation(bpy.types.Operator):
         print(f"相邻模式: {'启用' if settings.adjacent_mode else '禁用'}")
         
         use_model_center = (settings.positioning_mode == 'MODEL_CENTER')
+        # 当前坐标和下方一格的坐标一次换算完
+        grid = np.array(test_coords, dtype=np.float64)
+        world = get_world_coordinates_batch(grid, settings.base_block_size, size_x, size_y, size_z,
+                                            use_model_center, settings.adjacent_mode).tolist()
+        world_below = get_world_coordinates_batch(grid - (0.0, 0.0, 1.0), settings.base_block_size,
+                                                  size_x, size_y, size_z,
+                                                  use_model_center, settings.adjacent_mode).tolist()
         
         for i, (x, y, z) in enumerate(test_coords):
-            world_x, world_y, world_z = get_world_coordinate_for_model(
-                (x, y, z), settings.base_block_size, size_x, size_y, size_z,
-                settings.direction_mode, use_model_center, settings.adjacent_mode
-            )
+            world_x, world_y, world_z = world[i]
             
             print(f"  网格({x},{y},{z}) -> 世界({world_x:.3f},{world_y:.3f},{world_z:.3f})")
             
             # 如果是垂直方向，显示高度信息
             if z > 0:
-                prev_x, prev_y, prev_z = get_world_coordinate_for_model(
-                    (x, y, z-1), settings.base_block_size, size_x, size_y, size_z,
-                    settings.direction_mode, use_model_center, settings.adjacent_mode
-                )
+                prev_z = world_below[i][2]
                 height_diff = world_z - prev_z
                 print(f"      Z轴相邻: 底部在 {prev_z:.3f}, 当前在 {world_z:.3f}, 高度差: {height_diff:.3f} (期望: {size_z:.3f})")
         
@@ -3424,26 +3939,27 @@ class OBJECT_OT_test_mapping_system(bpy.types.Operator):
     
     def execute(self, context):
         scene = context.scene
+        settings = scene.block_generator_settings
         
         print(f"\n{'='*60}")
         print(f"测试映射系统")
         
         # 检查必要的路径
-        if not scene.models_base_path:
+        if not settings.models_base_path:
             self.report({'ERROR'}, "请先设置模型基础路径")
             return {'CANCELLED'}
         
-        if not scene.texture_base_path:
+        if not settings.texture_base_path:
             self.report({'ERROR'}, "请先设置贴图基础路径")
             return {'CANCELLED'}
         
         # 检查映射表
-        manager = BlockModelManager()
+        manager = _BLOCK_MANAGER
         
         # 修复：检查并重新加载映射表
-        if not manager._mapping_table and scene.mapping_table_path:
-            print(f"重新加载映射表: {scene.mapping_table_path}")
-            manager.set_mapping_table(scene.mapping_table_path)
+        if not manager._mapping_table and settings.mapping_table_path:
+            print(f"重新加载映射表: {settings.mapping_table_path}")
+            manager.set_mapping_table(settings.mapping_table_path)
         
         if not manager._mapping_table:
             self.report({'WARNING'}, "没有加载映射表，将无法测试映射系统")
@@ -3462,8 +3978,8 @@ class OBJECT_OT_test_mapping_system(bpy.types.Operator):
             print(f"  子模型名称: {mapping_data.get('submodel_name')}")
             print(f"  Z面贴图前缀: {mapping_data.get('z_texture_prefix')}")
             
-            # 创建模型配置
-            model_config = ModelConfig(position_id, mapping_data, scene.texture_base_path, scene.models_base_path)
+            # 获取（或构建）模型配置
+            model_config = manager.get_or_build_config(position_id, settings.texture_base_path, settings.models_base_path)
             
             print(f"  主模型: {'需要' if model_config.has_main_model() else '不需要'}")
             print(f"  子模型: {'需要' if model_config.has_submodel() else '不需要'}")
@@ -3487,8 +4003,8 @@ class OBJECT_OT_test_mapping_system(bpy.types.Operator):
             template = create_template_for_position_id(
                 context,
                 position_id,
-                scene.texture_base_path,
-                scene.models_base_path
+                settings.texture_base_path,
+                settings.models_base_path
             )
             
             if template:
@@ -3501,6 +4017,8 @@ class OBJECT_OT_test_mapping_system(bpy.types.Operator):
             else:
                 print(f"✗ 模板创建失败")
         
+        finalize_materials()
+        
         self.report({'INFO'}, "映射系统测试完成，查看控制台输出")
         return {'FINISHED'}
 
@@ -3518,11 +4036,11 @@ class OBJECT_OT_test_submodel_emission_material(bpy.types.Operator):
         print(f"测试子模型自发光材质")
         
         # 检查必要的路径
-        if not scene.models_base_path:
+        if not settings.models_base_path:
             self.report({'ERROR'}, "请先设置模型基础路径")
             return {'CANCELLED'}
         
-        if not scene.texture_base_path:
+        if not settings.texture_base_path:
             self.report({'ERROR'}, "请先设置贴图基础路径")
             return {'CANCELLED'}
         
@@ -3543,12 +4061,11 @@ class OBJECT_OT_test_submodel_emission_material(bpy.types.Operator):
         }
         
         # 设置映射数据
-        manager = BlockModelManager()
+        manager = _BLOCK_MANAGER
         manager._mapping_table[test_position_id] = test_mapping_data
         
-        # 创建模型配置
-        model_config = ModelConfig(test_position_id, test_mapping_data, scene.texture_base_path, scene.models_base_path)
-        manager.set_model_config(test_position_id, model_config)
+        # 获取（或构建）模型配置；映射数据换成测试数据后会自动重建
+        model_config = manager.get_or_build_config(test_position_id, settings.texture_base_path, settings.models_base_path)
         
         # 检查贴图路径
         print(f"测试子模型贴图:")
@@ -3598,11 +4115,12 @@ class OBJECT_OT_test_submodel_emission_material(bpy.types.Operator):
 class OBJECT_OT_cleanup_duplicate_materials(bpy.types.Operator):
     bl_idname = "object.cleanup_duplicate_materials"
     bl_label = "清理重复材质"
-    bl_description = "清理重复的方块材质"
+    bl_description = ("清理名称带.001等后缀的重复方块材质。贴图相同的方块共用材质，"
+                      "材质名沿用第一个创建它的位置ID，BlockMat_X_<id>不一定只属于该ID")
     bl_options = {'REGISTER', 'UNDO'}
     
     def execute(self, context):
-        manager = BlockModelManager()
+        manager = _BLOCK_MANAGER
         duplicates = manager.clear_duplicate_materials()
         
         self.report({'INFO'}, f"清理了 {len(duplicates)} 个重复材质")
@@ -3612,6 +4130,103 @@ class OBJECT_OT_cleanup_duplicate_materials(bpy.types.Operator):
 # 面板类
 # ============================================================================
 
+# 面板绘制用的文件系统检查缓存：键 -> (检查时间, 结果)
+# 面板随鼠标移动频繁重绘，短时间内不重复访问文件系统；设置路径时整体清空
+_PANEL_EXISTS_CACHE = {}
+_PANEL_EXISTS_TTL = 2.0
+
+def _panel_cached(key, probe):
+    """带短时缓存地执行一次文件系统检查，仅用于面板显示"""
+    now = time.monotonic()
+    hit = _PANEL_EXISTS_CACHE.get(key)
+    if hit is not None and now - hit[0] < _PANEL_EXISTS_TTL:
+        return hit[1]
+    result = probe()
+    _PANEL_EXISTS_CACHE[key] = (now, result)
+    return result
+
+# 面板显示的位置ID统计：[Coordinates, ((ID, 数量), ...)]；坐标解析结果本身已缓存，这里按对象身份复用
+_PANEL_ID_COUNTS = [None, ()]
+
+def _panel_id_counts(coordinates):
+    """按位置ID统计坐标数量（升序），同一份解析结果只统计一次"""
+    if _PANEL_ID_COUNTS[0] is not coordinates:
+        unique_ids, counts = np.unique(coordinates.ids, return_counts=True)
+        _PANEL_ID_COUNTS[0] = coordinates
+        _PANEL_ID_COUNTS[1] = tuple(zip(unique_ids.tolist(), counts.tolist()))
+    return _PANEL_ID_COUNTS[1]
+
+def _panel_exists(path):
+    """带短时缓存的os.path.exists"""
+    return _panel_cached(path, lambda: os.path.exists(path))
+
+# 模型根目录检查结果：根目录、models文件夹、models/block.obj 是否存在
+ModelsTreeProbe = namedtuple('ModelsTreeProbe', 'base_ok models_ok block_obj_ok')
+
+def _find_entry(folder, name, want_dir):
+    """在文件夹的一次scandir枚举中查找指定名称的子文件夹/文件，返回其路径或None"""
+    name = os.path.normcase(name)
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if os.path.normcase(entry.name) == name:
+                # DirEntry 自带目录项类型，不再单独stat
+                found = entry.is_dir() if want_dir else entry.is_file()
+                return entry.path if found else None
+    return None
+
+def _probe_models_tree(base):
+    """用两次目录枚举代替三次逐路径stat，检查模型根目录结构"""
+    try:
+        models_folder = _find_entry(base, "models", want_dir=True)
+    except OSError:
+        # 不存在，或者不是文件夹（此时与原先的exists判断保持一致）
+        return ModelsTreeProbe(os.path.exists(base), False, False)
+    if models_folder is None:
+        return ModelsTreeProbe(True, False, False)
+    try:
+        block_obj = _find_entry(models_folder, "block.obj", want_dir=False)
+    except OSError:
+        block_obj = None
+    return ModelsTreeProbe(True, True, block_obj is not None)
+
+# 面板说明文本（模块加载时构建一次）
+_HELP_LINES = (
+    "坐标格式: x,y,z,id (每行一个)",
+    "示例: -4,0,9,1",
+    "映射表格式: CSV文件，第7、45、46字段控制模型",
+    "第7字段: blocktype决定材质系统",
+    "第45字段: 主贴图前缀",
+    "第46字段: 子模型名称",
+    "主模型: models/block.obj (teamspawn类型使用id/teamspawn.obj)",
+    "子模型: {id}/{name}.obj",
+    "主贴图: {id}/hupo_[x|y|z].png",
+    "子贴图: {id}/{name}.png",
+    "子自发光: {id}/{name}_emi.png",
+    "材质系统: 根据blocktype自动选择",
+    "teamspawn: 只使用一个材质球，贴图处理模型和正常数组相反",
+    "minestone: 所有面使用同一个贴图，Z面和-Z面已修复UV映射",
+    "soil/plantash: Z面特殊，其他面相同",
+    "teamspawn: 强制使用主模型(id/teamspawn.obj)，使用teamspawn0贴图，全部面同一材质",
+    "replicator: 根据有无主贴图决定材质系统",
+    "相邻模式: 根据模型尺寸调整位置",
+    "定位模式: 模型中心或底部对齐",
+    "UV镜像: Z和-Z面镜像X轴并向左旋转90度",
+    "材质共享: 贴图相同的面/子模型共用材质球，名称沿用首个创建它的ID",
+    "自发光支持: 子模型支持自发光贴图混合",
+    "修复: 材质名称重复和Z面贴图问题",
+    "修复: buildblueprint类型使用minestone系统",
+    "修复: 映射表重新加载问题",
+    "新增: teamspawn类型支持id/teamspawn.obj",
+    "修复: Z面和-Z面UV映射问题",
+    "新增: teamspawn类型独立材质系统，只使用一个材质球",
+    "修复: 尺寸缩放问题，现在在模板创建时正确应用缩放",
+    "修复: 子模型缩放问题，现在子模型会正确应用等比缩放因子",
+    "新增: 重新加载映射表功能，清空模板时保留路径设置",
+    "修复: 完全支持等比缩放，主模型和子模型使用相同的缩放因子",
+    "注意: 主模型默认100尺寸，子模型不规则尺寸，保持等比缩放",
+    "注意: 保持OBJ导入的原始精度，不进行四舍五入",
+)
+
 class VIEW3D_PT_block_generator_main(bpy.types.Panel):
     bl_label = "方块网格生成器增强版"
     bl_idname = "VIEW3D_PT_block_generator_main"
@@ -3633,15 +4248,15 @@ class VIEW3D_PT_block_generator_main(bpy.types.Panel):
         row.operator("object.load_mapping_table", text="加载映射表", icon='FILEBROWSER')
         row.operator("object.reload_mapping_table", text="重新加载", icon='FILE_REFRESH')
         
-        if scene.mapping_table_path:
-            col.label(text=f"当前映射表: {scene.mapping_table_path}", icon='INFO')
+        if settings.mapping_table_path:
+            col.label(text=f"当前映射表: {settings.mapping_table_path}", icon='INFO')
             
             # 显示映射表统计
-            manager = BlockModelManager()
+            manager = _BLOCK_MANAGER
             mapping_count = manager.get_mapping_count()
             
             # 修复：如果映射表为空但路径存在，尝试重新加载
-            if mapping_count == 0 and scene.mapping_table_path and os.path.exists(scene.mapping_table_path):
+            if mapping_count == 0 and settings.mapping_table_path and _panel_exists(settings.mapping_table_path):
                 col.label(text="映射表文件存在但未加载，点击'重新加载'重新加载", icon='ERROR')
             elif mapping_count > 0:
                 col.label(text=f"已加载 {mapping_count} 个映射条目", icon='INFO')
@@ -3656,21 +4271,22 @@ class VIEW3D_PT_block_generator_main(bpy.types.Panel):
         col.operator("object.set_models_base_path", text="设置模型基础路径", icon='FILEBROWSER')
         col.operator("object.set_texture_base_path", text="设置贴图基础路径", icon='FILEBROWSER')
         
-        if scene.models_base_path:
-            col.label(text=f"模型路径: {scene.models_base_path}", icon='INFO')
+        if settings.models_base_path:
+            col.label(text=f"模型路径: {settings.models_base_path}", icon='INFO')
             
-            # 检查路径是否存在
-            if os.path.exists(scene.models_base_path):
+            # 检查路径、models文件夹和block.obj是否存在（一次探测，结果短时缓存）
+            models_base_path = settings.models_base_path
+            probe = _panel_cached(('models_tree', models_base_path),
+                                  lambda: _probe_models_tree(models_base_path))
+            if probe.base_ok:
                 col.label(text="✓ 路径存在", icon='CHECKMARK')
                 
                 # 检查是否有models文件夹
-                models_folder = os.path.join(scene.models_base_path, "models")
-                if os.path.exists(models_folder):
+                if probe.models_ok:
                     col.label(text="✓ models文件夹存在", icon='CHECKMARK')
                     
                     # 检查是否有block.obj
-                    block_path = os.path.join(models_folder, "block.obj")
-                    if os.path.exists(block_path):
+                    if probe.block_obj_ok:
                         col.label(text="✓ block.obj存在", icon='CHECKMARK')
                     else:
                         col.label(text="⚠ block.obj不存在", icon='ERROR')
@@ -3679,11 +4295,11 @@ class VIEW3D_PT_block_generator_main(bpy.types.Panel):
             else:
                 col.label(text="⚠ 警告: 路径不存在", icon='ERROR')
         
-        if scene.texture_base_path:
-            col.label(text=f"贴图路径: {scene.texture_base_path}", icon='INFO')
+        if settings.texture_base_path:
+            col.label(text=f"贴图路径: {settings.texture_base_path}", icon='INFO')
             
             # 检查路径是否存在
-            if os.path.exists(scene.texture_base_path):
+            if _panel_exists(settings.texture_base_path):
                 col.label(text="✓ 路径存在", icon='CHECKMARK')
             else:
                 col.label(text="⚠ 警告: 路径不存在", icon='ERROR')
@@ -3718,6 +4334,12 @@ class VIEW3D_PT_block_generator_main(bpy.types.Panel):
         # 相邻模式
         col.prop(settings, "adjacent_mode", text="启用相邻模式")
         
+        # 合批生成
+        col.prop(settings, "batch_blocks", text="合并同类方块")
+        
+        # 详细日志
+        col.prop(settings, "verbose_logging", text="详细日志")
+        
         # 自发光设置
         col = box.column(align=True)
         col.label(text="自发光强度:")
@@ -3737,20 +4359,18 @@ class VIEW3D_PT_block_generator_main(bpy.types.Panel):
         row = col.row(align=True)
         row.operator("object.import_positions", text="导入位置", icon='IMPORT')
         
-        if scene.grid_coordinates.strip():
-            coordinates = parse_coordinate_string(scene.grid_coordinates)
-            if coordinates:
-                id_counts = {}
-                for coord in coordinates:
-                    position_id = coord['id']
-                    id_counts[position_id] = id_counts.get(position_id, 0) + 1
+        grid_text = settings.grid_coordinates
+        if grid_text.strip():
+            coordinates = parse_coordinate_string(grid_text)
+            if coordinates.ids.size:
+                id_counts = _panel_id_counts(coordinates)
                 
-                col.label(text=f"已解析 {len(coordinates)} 个坐标", icon='INFO')
+                col.label(text=f"已解析 {coordinates.ids.size} 个坐标", icon='INFO')
                 col.label(text=f"包含 {len(id_counts)} 种不同位置ID", icon='INFO')
                 
                 # 显示ID统计
                 if len(id_counts) <= 10:
-                    for pid, count in sorted(id_counts.items()):
+                    for pid, count in id_counts:
                         col.label(text=f"  ID {pid}: {count} 个", icon='DOT')
         
         # 生成按钮
@@ -3776,150 +4396,102 @@ class VIEW3D_PT_block_generator_main(bpy.types.Panel):
         row = col.row(align=True)
         row.operator("object.clear_all_templates_and_mapping", text="清除所有（包括映射表）", icon='CANCEL')
         
-        # 说明
+        # 说明（默认折叠，展开时才创建这些标签）
         box = layout.box()
-        box.label(text="说明", icon='INFO')
+        row = box.row()
+        row.prop(settings, "show_help", text="",
+                 icon='TRIA_DOWN' if settings.show_help else 'TRIA_RIGHT', emboss=False)
+        row.label(text="说明", icon='INFO')
+        
+        if not settings.show_help:
+            return
         
         col = box.column(align=True)
-        col.label(text="坐标格式: x,y,z,id (每行一个)")
-        col.label(text="示例: -4,0,9,1")
-        col.label(text="映射表格式: CSV文件，第7、45、46字段控制模型")
-        col.label(text="第7字段: blocktype决定材质系统")
-        col.label(text="第45字段: 主贴图前缀")
-        col.label(text="第46字段: 子模型名称")
-        col.label(text="主模型: models/block.obj (teamspawn类型使用id/teamspawn.obj)")
-        col.label(text="子模型: {id}/{name}.obj")
-        col.label(text="主贴图: {id}/hupo_[x|y|z].png")
-        col.label(text="子贴图: {id}/{name}.png")
-        col.label(text="子自发光: {id}/{name}_emi.png")
-        col.label(text="材质系统: 根据blocktype自动选择")
-        col.label(text="teamspawn: 只使用一个材质球，贴图处理模型和正常数组相反")
-        col.label(text="minestone: 所有面使用同一个贴图，Z面和-Z面已修复UV映射")
-        col.label(text="soil/plantash: Z面特殊，其他面相同")
-        col.label(text="teamspawn: 强制使用主模型(id/teamspawn.obj)，使用teamspawn0贴图，全部面同一材质")
-        col.label(text="replicator: 根据有无主贴图决定材质系统")
-        col.label(text="相邻模式: 根据模型尺寸调整位置")
-        col.label(text="定位模式: 模型中心或底部对齐")
-        col.label(text="UV镜像: Z和-Z面镜像X轴并向左旋转90度")
-        col.label(text="材质共享: 相同ID和面类型使用相同材质球")
-        col.label(text="自发光支持: 子模型支持自发光贴图混合")
-        col.label(text="修复: 材质名称重复和Z面贴图问题")
-        col.label(text="修复: buildblueprint类型使用minestone系统")
-        col.label(text="修复: 映射表重新加载问题")
-        col.label(text="新增: teamspawn类型支持id/teamspawn.obj")
-        col.label(text="修复: Z面和-Z面UV映射问题")
-        col.label(text="新增: teamspawn类型独立材质系统，只使用一个材质球")
-        col.label(text="修复: 尺寸缩放问题，现在在模板创建时正确应用缩放")
-        col.label(text="修复: 子模型缩放问题，现在子模型会正确应用等比缩放因子")
-        col.label(text="新增: 重新加载映射表功能，清空模板时保留路径设置")
-        col.label(text="修复: 完全支持等比缩放，主模型和子模型使用相同的缩放因子")
-        col.label(text="注意: 主模型默认100尺寸，子模型不规则尺寸，保持等比缩放")
-        col.label(text="注意: 保持OBJ导入的原始精度，不进行四舍五入")
+        for line in _HELP_LINES:
+            col.label(text=line)
 
 # ============================================================================
 # 注册函数
 # ============================================================================
 
+# 注册顺序：属性组在前（设置依赖模型条目），面板在最后；取消注册时按相反顺序
+classes = (
+    BlockModelItem,
+    BlockGeneratorSettings,
+    OBJECT_OT_load_block_models,
+    OBJECT_OT_set_texture_base_path,
+    OBJECT_OT_set_models_base_path,
+    OBJECT_OT_load_mapping_table,
+    OBJECT_OT_reload_mapping_table,
+    OBJECT_OT_import_positions,
+    OBJECT_OT_generate_from_grid,
+    OBJECT_OT_clear_all_blocks,
+    OBJECT_OT_clear_all_templates,
+    OBJECT_OT_clear_all_templates_and_mapping,
+    OBJECT_OT_debug_position_calculation,
+    OBJECT_OT_test_mapping_system,
+    OBJECT_OT_test_submodel_emission_material,
+    OBJECT_OT_cleanup_duplicate_materials,
+    VIEW3D_PT_block_generator_main,
+)
+
+# 只用工厂生成的注册函数；取消注册按is_registered逐个判断，见unregister()
+_register_classes = bpy.utils.register_classes_factory(classes)[0]
+
+# 旧版本把坐标和路径直接注册在Scene上，旧文件里这些值仍以场景ID属性的形式保留
+_LEGACY_SCENE_SETTINGS = ('grid_coordinates', 'texture_base_path', 'models_base_path', 'mapping_table_path')
+
+@bpy.app.handlers.persistent
+def _migrate_legacy_scene_settings(*_args):
+    """打开文件后把旧的场景属性搬到block_generator_settings（新字段为空时才覆盖）"""
+    for scene in bpy.data.scenes:
+        settings = scene.block_generator_settings
+        for name in _LEGACY_SCENE_SETTINGS:
+            value = scene.get(name)
+            if value is None:
+                continue
+            if isinstance(value, str) and value and not getattr(settings, name):
+                setattr(settings, name, value)
+            # 搬完后删除旧属性，之后再清空新字段也不会被旧值覆盖回来
+            del scene[name]
+
 def register():
     """注册所有类"""
-    classes = [
-        BlockModelItem,
-        BlockGeneratorSettings,
-        OBJECT_OT_load_block_models,
-        OBJECT_OT_set_texture_base_path,
-        OBJECT_OT_set_models_base_path,
-        OBJECT_OT_load_mapping_table,
-        OBJECT_OT_reload_mapping_table,
-        OBJECT_OT_import_positions,
-        OBJECT_OT_generate_from_grid,
-        OBJECT_OT_clear_all_blocks,
-        OBJECT_OT_clear_all_templates,
-        OBJECT_OT_clear_all_templates_and_mapping,
-        OBJECT_OT_debug_position_calculation,
-        OBJECT_OT_test_mapping_system,
-        OBJECT_OT_test_submodel_emission_material,
-        OBJECT_OT_cleanup_duplicate_materials,
-        VIEW3D_PT_block_generator_main,
-    ]
-    
-    for cls in classes:
-        try:
-            bpy.utils.register_class(cls)
-        except Exception as e:
-            print(f"注册类 {cls.__name__} 失败: {e}")
+    # 重复注册（例如未先禁用就再次启用或重新加载插件）时先完整取消上一次注册；
+    # 用is_registered判断而不是对每个类try/except
+    if any(cls.is_registered for cls in classes):
+        unregister()
+    _register_classes()
     
     # 场景属性
     bpy.types.Scene.block_generator_settings = bpy.props.PointerProperty(type=BlockGeneratorSettings)
     
-    bpy.types.Scene.grid_coordinates = bpy.props.StringProperty(
-        name="坐标信息",
-        description="方块位置信息，格式: x,y,z,id (id在最后，对应位置ID)",
-        default="",
-    )
-    
-    bpy.types.Scene.texture_base_path = bpy.props.StringProperty(
-        name="贴图基础路径",
-        description="贴图文件的基础路径，例如: F:/Project/blender/pluge/black/",
-        default="",
-        subtype='DIR_PATH'
-    )
-    
-    bpy.types.Scene.models_base_path = bpy.props.StringProperty(
-        name="模型基础路径",
-        description="模型文件的基础路径，例如: F:/Project/blender/pluge/",
-        default="",
-        subtype='DIR_PATH'
-    )
-    
-    bpy.types.Scene.mapping_table_path = bpy.props.StringProperty(
-        name="映射表路径",
-        description="映射表文件路径",
-        default="",
-        subtype='FILE_PATH'
-    )
-    
     bpy.types.Scene.block_models = bpy.props.CollectionProperty(type=BlockModelItem)
     bpy.types.Scene.block_models_index = bpy.props.IntProperty(name="当前模型索引")
+    
+    if _face_cache_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_face_cache_depsgraph_update)
+    if _migrate_legacy_scene_settings not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_migrate_legacy_scene_settings)
 
 def unregister():
     """取消注册所有类"""
-    classes = [
-        VIEW3D_PT_block_generator_main,
-        OBJECT_OT_cleanup_duplicate_materials,
-        OBJECT_OT_test_submodel_emission_material,
-        OBJECT_OT_test_mapping_system,
-        OBJECT_OT_debug_position_calculation,
-        OBJECT_OT_clear_all_templates_and_mapping,
-        OBJECT_OT_clear_all_templates,
-        OBJECT_OT_clear_all_blocks,
-        OBJECT_OT_generate_from_grid,
-        OBJECT_OT_import_positions,
-        OBJECT_OT_reload_mapping_table,
-        OBJECT_OT_load_mapping_table,
-        OBJECT_OT_set_models_base_path,
-        OBJECT_OT_set_texture_base_path,
-        OBJECT_OT_load_block_models,
-        BlockGeneratorSettings,
-        BlockModelItem,
-    ]
-    
+    # 只取消已注册的类：上一次注册中途失败时，后面的类并没有注册成功
     for cls in reversed(classes):
-        try:
+        if cls.is_registered:
             bpy.utils.unregister_class(cls)
-        except RuntimeError:
-            pass
+    
+    if _face_cache_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_face_cache_depsgraph_update)
+    if _migrate_legacy_scene_settings in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_migrate_legacy_scene_settings)
+    invalidate_face_cache()
+    set_verbose_logging(False)
     
     # 删除自定义属性
     try:
         del bpy.types.Scene.block_generator_settings
-        del bpy.types.Scene.grid_coordinates
-        del bpy.types.Scene.texture_base_path
-        del bpy.types.Scene.models_base_path
-        del bpy.types.Scene.mapping_table_path
         del bpy.types.Scene.block_models
         del bpy.types.Scene.block_models_index
     except:
         pass
-
-if __name__ == "__main__":
-    register()
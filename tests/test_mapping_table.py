@@ -0,0 +1,87 @@
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip("bpy")
+pytest.importorskip("pandas")
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def addon():
+    spec = importlib.util.spec_from_file_location("miniworld_addon", os.path.join(REPO, "_init_.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _parse_both(addon, monkeypatch, capsys, path):
+    fast = addon.parse_mapping_table(path)
+    # 确认确实走了pandas路径，而不是回退到逐行解析
+    assert "(pandas)" in capsys.readouterr().out
+    with monkeypatch.context() as m:
+        m.setattr(addon, "pd", None)
+        slow = addon.parse_mapping_table(path)
+    return fast, slow
+
+
+def _row(position_id, blocktype="stone", main="hupo", sub="hupo1"):
+    fields = [""] * 46
+    fields[0] = str(position_id)
+    fields[6] = blocktype
+    fields[43] = main
+    fields[44] = sub
+    fields[45] = "blocks." + blocktype
+    return ",".join(fields)
+
+
+def _write(tmp_path, lines):
+    path = tmp_path / "table.csv"
+    path.write_bytes("\r\n".join(lines).encode("utf-8"))
+    return str(path)
+
+
+def test_shipped_table_matches_line_parser(addon, monkeypatch, capsys):
+    fast, slow = _parse_both(addon, monkeypatch, capsys, os.path.join(REPO, "def.csv"))
+    assert fast
+    assert fast == slow
+
+
+def test_blank_and_separator_lines_stay_on_pandas(addon, monkeypatch, capsys, tmp_path):
+    path = _write(tmp_path, [
+        "=header",
+        _row(1),
+        "",
+        "   ",
+        _row(4, blocktype="soil", main="", sub=""),
+        "==========",
+        " 5" + _row(5)[1:],
+    ])
+
+    fast, slow = _parse_both(addon, monkeypatch, capsys, path)
+    assert sorted(fast) == [1, 4, 5]
+    assert fast == slow
+
+
+def test_invalid_rows_fall_back_to_line_parser(addon, capsys, tmp_path):
+    path = _write(tmp_path, [
+        _row(1),
+        "2,x,x",
+        "abc" + _row(3)[1:],
+        _row(4, blocktype="soil", main="", sub=""),
+        "",
+        ",,,",
+        "6,short",
+    ])
+
+    assert addon._parse_mapping_table_pandas(path) is None
+    mapping = addon.parse_mapping_table(path)
+    out = capsys.readouterr().out
+    assert sorted(mapping) == [1, 4]
+    # 逐行解析按物理行号报告每一个无效行
+    for line_num in (2, 6, 7):
+        assert f"跳过无效行（字段不足）行 {line_num}:" in out
+    assert "解析行时出错 3:" in out
+    assert "(pandas)" not in out